@@ -0,0 +1,392 @@
+"""
+Benchmarks how each pass of the reconciler scales, on synthetic scraped feeds that
+are far larger than the stations in Massachusetts the spiders currently cover.
+
+Every synthetic site is seen by a random mix of the sources a real station is, its
+network's own spider, the AFDC, OpenStreetMap and Open Charge Map, each with its
+coordinates jittered and its address written a little differently. Loading the
+feeds, every pass of `combine_stations` and the GeoJSON export are each timed, along
+with how much memory they needed.
+
+Configured through environment variables, the same as `reconcile.py`:
+
+- `BENCHMARK_SIZES` is a comma-separated list of how many sites to generate,
+  "10000,100000,1000000" by default
+- `BENCHMARK_SEED` seeds the generator so runs can be compared, 0 by default
+- `BENCHMARK_TRACE_MEMORY` measures the peak memory of each pass with tracemalloc,
+  which is exact but makes everything several times slower. Otherwise the change in
+  the resident memory of the process from before to after each pass is reported,
+  which is what its result holds on to rather than its peak. Resident memory is
+  read from `/proc`, so tracemalloc is always used where that isn't available.
+- `BENCHMARK_RESULTS` is a path to write the results to as JSON
+- `BENCHMARK_BASELINE` is the path of results written by an earlier run, which
+  every pass is compared against
+"""
+
+from typing import Optional
+import contextlib
+import gc
+import json
+import os
+import pathlib
+import random
+import tempfile
+import time
+import tracemalloc
+
+import reconcile
+
+# Metropolitan areas stations are clustered around, as latitude, longitude, the spread of their stations in
+# degrees and how many of the stations are in them compared to each other
+METRO_AREAS = [
+    (40.71, -74.01, 0.35, 10),
+    (34.05, -118.24, 0.45, 12),
+    (41.88, -87.63, 0.3, 6),
+    (29.76, -95.37, 0.35, 4),
+    (33.45, -112.07, 0.3, 4),
+    (39.95, -75.17, 0.25, 4),
+    (37.77, -122.42, 0.35, 9),
+    (47.61, -122.33, 0.25, 5),
+    (42.36, -71.06, 0.3, 6),
+    (38.91, -77.04, 0.3, 6),
+    (33.75, -84.39, 0.3, 4),
+    (25.76, -80.19, 0.25, 4),
+    (39.74, -104.99, 0.25, 4),
+    (44.98, -93.27, 0.25, 3),
+    (32.78, -96.80, 0.35, 5),
+]
+
+# Stations outside of metropolitan areas are spread across the contiguous United States
+RURAL_BOUNDS = (25.0, 49.0, -124.5, -67.0)
+RURAL_WEIGHT = 20
+
+# Networks as they are written into the feeds, the system of their own spider, and how common they are
+NETWORKS = [
+    ("CHARGEPOINT", "CHARGEPOINT", 30),
+    ("BLINK", "BLINK", 8),
+    ("EVGO", "EVGO", 5),
+    ("ELECTRIFY_AMERICA", "ELECTRIFY_AMERICA", 5),
+    ("TESLA_SUPERCHARGER", "TESLA", 6),
+    ("TESLA_DESTINATION", "TESLA", 6),
+    ("ENEL_X", "ENEL_X_EMOBILITY_US", 3),
+    ("FLO", "FLO", 2),
+    ("EV_CONNECT", "EV_CONNECT", 3),
+    ("SHELL_RECHARGE", "SHELL_RECHARGE_GREENLOTS", 3),
+    ("AMPUP", "AMP_UP", 2),
+    ("NON_NETWORKED", None, 20),
+    ("", None, 7),
+]
+
+STREET_NAMES = ["Main", "Elm", "Washington", "Park", "Maple", "Oak", "Pine", "Lake", "Hill", "Church", "Center"]
+STREET_SUFFIXES = [("Street", "St"), ("Avenue", "Ave"), ("Road", "Rd"), ("Boulevard", "Blvd"), ("Drive", "Dr")]
+CITY_NAMES = ["Springfield", "Franklin", "Greenville", "Bristol", "Clinton", "Fairview", "Salem", "Madison"]
+STATE_CODES = ["CA", "NY", "TX", "FL", "IL", "MA", "WA", "GA", "CO", "AZ"]
+
+PLUG_LAYOUTS = [["J1772"], ["J1772"], ["J1772", "J1772"], ["J1772_COMBO"], ["J1772_COMBO", "CHADEMO"], ["NACS"]]
+
+
+def generate_feed_items(site_count: int, seed: int = 0):
+    """
+    Yields the scraped feed item of each source of each synthetic site, along with
+    the name of the feed it belongs in.
+    """
+
+    rnd = random.Random(seed)
+
+    area_weights = [weight for _, _, _, weight in METRO_AREAS] + [RURAL_WEIGHT]
+    network_weights = [weight for _, _, weight in NETWORKS]
+
+    for site in range(site_count):
+        area = rnd.choices(range(len(area_weights)), area_weights)[0]
+
+        if area < len(METRO_AREAS):
+            metro_latitude, metro_longitude, metro_spread, _ = METRO_AREAS[area]
+
+            latitude = rnd.gauss(metro_latitude, metro_spread)
+            longitude = rnd.gauss(metro_longitude, metro_spread)
+        else:
+            min_latitude, max_latitude, min_longitude, max_longitude = RURAL_BOUNDS
+
+            latitude = rnd.uniform(min_latitude, max_latitude)
+            longitude = rnd.uniform(min_longitude, max_longitude)
+
+        network, network_system, _ = rnd.choices(NETWORKS, network_weights)[0]
+
+        street_name = rnd.choice(STREET_NAMES)
+        street_suffix = rnd.choice(STREET_SUFFIXES)
+        house_number = rnd.randint(1, 9999)
+        city = rnd.choice(CITY_NAMES)
+        state = rnd.choice(STATE_CODES)
+        zip_code = f"{rnd.randint(1000, 99999):05}"
+
+        network_id = f"{network[:3]}-{site}"
+        nrel_id = 100000 + site
+        osm_id = f"node:{10000000 + site}"
+        ocm_id = 200000 + site
+
+        point_count = rnd.choices([1, 2, 4, 8, 12], [40, 30, 15, 10, 5])[0]
+        plug_layout = rnd.choice(PLUG_LAYOUTS)
+
+        def address():
+            if rnd.random() < 0.15:
+                return None
+
+            # Sources abbreviate the street suffix and capitalize differently
+            street_address = f"{house_number} {street_name} {rnd.choice(street_suffix)}"
+
+            if rnd.random() < 0.2:
+                street_address = street_address.upper()
+
+            raw_address = {"street_address": street_address, "city": city, "state": state}
+
+            if rnd.random() < 0.8:
+                raw_address["zip_code"] = zip_code
+
+            return raw_address
+
+        def location(jitter_degrees: float):
+            return {
+                "latitude": latitude + rnd.gauss(0, jitter_degrees),
+                "longitude": longitude + rnd.gauss(0, jitter_degrees),
+            }
+
+        def charging_points(with_ids: bool):
+            points = []
+
+            for point_index in range(point_count):
+                raw_point = {
+                    "evses": [
+                        {
+                            "network_id": f"{network_id}-{point_index}-{port_index}" if with_ids else None,
+                            "plugs": [{"plug": plug}],
+                        }
+                        for port_index, plug in enumerate(plug_layout)
+                    ],
+                }
+
+                if with_ids:
+                    raw_point["name"] = f"{point_index + 1}"
+                    raw_point["network_id"] = f"{network_id}-{point_index}"
+
+                points.append(raw_point)
+
+            return points
+
+        def item(system: str, quality: str, jitter_degrees: float, **fields):
+            raw_item = {
+                "source": {"system": system, "quality": quality},
+                "location": location(jitter_degrees),
+                "network": network,
+                "references": [],
+                "charging_points": [],
+            }
+
+            if rnd.random() < 0.85:
+                raw_item["name"] = f"{street_name} {rnd.choice(['Station', 'Charging', 'Garage', 'Plaza'])} {site}"
+
+            if raw_address := address():
+                raw_item["address"] = raw_address
+
+            raw_item.update(fields)
+
+            return raw_item
+
+        if network_system and rnd.random() < 0.85:
+            yield network_system.lower(), item(
+                network_system,
+                "ORIGINAL",
+                0.00001,
+                network_id=network_id,
+                charging_points=charging_points(with_ids=True),
+            )
+
+        if rnd.random() < 0.75:
+            nrel_references = [{"system": "ALTERNATIVE_FUEL_DATA_CENTER", "identifier": nrel_id}]
+
+            if rnd.random() < 0.2:
+                nrel_references.append({"system": "OPEN_STREET_MAP", "identifier": osm_id})
+
+            yield "nrel_afdc", item(
+                "ALTERNATIVE_FUEL_DATA_CENTER",
+                "AGGREGATED",
+                0.0002,
+                network_id=network_id if network_system and rnd.random() < 0.4 else None,
+                references=nrel_references,
+                charging_points=charging_points(with_ids=False),
+            )
+
+        if rnd.random() < 0.55:
+            osm_references = [{"system": "OPEN_STREET_MAP", "identifier": osm_id}]
+
+            if rnd.random() < 0.3:
+                osm_references.append({"system": "ALTERNATIVE_FUEL_DATA_CENTER", "identifier": str(nrel_id)})
+
+            yield "openstreetmap", item(
+                "OPEN_STREET_MAP",
+                "CURATED",
+                0.00005,
+                network=network if rnd.random() < 0.7 else "",
+                references=osm_references,
+            )
+
+        if rnd.random() < 0.35:
+            ocm_references = [{"system": "OPEN_CHARGE_MAP", "identifier": ocm_id}]
+
+            if rnd.random() < 0.5:
+                ocm_references.append({"system": "ALTERNATIVE_FUEL_DATA_CENTER", "identifier": nrel_id})
+
+            yield "openchargemap", item(
+                "OPEN_CHARGE_MAP",
+                "AGGREGATED",
+                rnd.choice([0.0001, 0.001, 0.004]),
+                network=network if rnd.random() < 0.5 else "",
+                references=ocm_references,
+            )
+
+
+def write_feeds(data_dir: pathlib.Path, site_count: int, seed: int) -> list[pathlib.Path]:
+    """
+    Writes the synthetic feed items into one JSON Lines feed for each source, the
+    same as the scraped data the reconciler loads.
+    """
+
+    feed_files = {}
+
+    try:
+        for feed_name, raw_item in generate_feed_items(site_count, seed):
+            if feed_name not in feed_files:
+                feed_files[feed_name] = (data_dir / f"{feed_name}.jsonl").open("w", encoding="utf-8")
+
+            feed_files[feed_name].write(json.dumps(raw_item))
+            feed_files[feed_name].write("\n")
+    finally:
+        for feed_fh in feed_files.values():
+            feed_fh.close()
+
+    return sorted(data_dir / f"{feed_name}.jsonl" for feed_name in feed_files)
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """
+    Returns how much memory the process currently has resident, or `None` when it
+    can't be read on this platform.
+    """
+
+    try:
+        with open("/proc/self/statm") as statm_fh:
+            resident_pages = int(statm_fh.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(results: list[dict], site_count: int, pass_name: str, function, *args):
+    """
+    Runs a single pass, recording how long it took and how much memory it needed
+    into the results, and returns what the pass returned.
+    """
+
+    gc.collect()
+
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    else:
+        memory_before = resident_memory_bytes()
+
+    # Passes print every conflict they come across, which would bury the results
+    with open(os.devnull, "w") as null_fh, contextlib.redirect_stdout(null_fh):
+        start_time = time.perf_counter()
+
+        result = function(*args)
+
+        elapsed_seconds = time.perf_counter() - start_time
+
+    if tracemalloc.is_tracing():
+        memory_bytes = tracemalloc.get_traced_memory()[1] - memory_before
+    else:
+        gc.collect()
+
+        memory_bytes = resident_memory_bytes() - memory_before
+
+    results.append({
+        "sites": site_count,
+        "pass": pass_name,
+        "seconds": elapsed_seconds,
+        "memory_bytes": memory_bytes,
+        "stations": len(result) if isinstance(result, list) else None,
+    })
+
+    print(f"{site_count:>9} {pass_name:<70} {elapsed_seconds:>9.2f}s {memory_bytes / 2**20:>9.1f} MiB", flush=True)
+
+    return result
+
+
+def load_feeds(feed_files: list[pathlib.Path]) -> list[reconcile.Station]:
+    stations = []
+
+    for feed_file in feed_files:
+        stations.extend(reconcile.load_feed_stations(feed_file))
+
+    return stations
+
+
+def export_geojson(stations: list[reconcile.Station]) -> list[reconcile.Station]:
+    with open(os.devnull, "w", encoding="utf-8") as null_fh, reconcile.GeoJSONFeatureWriter(null_fh) as writer:
+        for station in stations:
+            writer.write(reconcile.station_to_geojson_feature(station))
+
+    return stations
+
+
+def benchmark_size(results: list[dict], site_count: int, seed: int):
+    with tempfile.TemporaryDirectory(prefix="reconcile-benchmark-") as data_dir:
+        feed_files = write_feeds(pathlib.Path(data_dir), site_count, seed)
+
+        stations = measure(results, site_count, "load_feed_stations", load_feeds, feed_files)
+
+    for combine_pass in reconcile.COMBINE_STATION_PASSES:
+        stations = measure(results, site_count, combine_pass.__name__, combine_pass, stations)
+
+    measure(results, site_count, "export_geojson", export_geojson, stations)
+
+
+def print_comparison(results: list[dict], baseline_results: list[dict]):
+    baseline_seconds = {(result["sites"], result["pass"]): result["seconds"] for result in baseline_results}
+
+    print()
+    print("Compared to the baseline:")
+
+    for result in results:
+        previous_seconds = baseline_seconds.get((result["sites"], result["pass"]))
+
+        if not previous_seconds:
+            continue
+
+        print(f"{result['sites']:>9} {result['pass']:<70} {result['seconds'] / previous_seconds:>9.2f}x")
+
+
+def main():
+    site_counts = [int(size) for size in os.getenv("BENCHMARK_SIZES", "10000,100000,1000000").split(",")]
+    seed = int(os.getenv("BENCHMARK_SEED", 0))
+
+    if os.getenv("BENCHMARK_TRACE_MEMORY") or resident_memory_bytes() is None:
+        tracemalloc.start()
+
+    results = []
+
+    for site_count in site_counts:
+        benchmark_size(results, site_count, seed)
+
+    if results_file := os.getenv("BENCHMARK_RESULTS"):
+        with open(results_file, "w") as results_fh:
+            json.dump({"seed": seed, "results": results}, results_fh, indent=2)
+
+    if baseline_file := os.getenv("BENCHMARK_BASELINE"):
+        with open(baseline_file) as baseline_fh:
+            print_comparison(results, json.load(baseline_fh)["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,46 @@
-import { fetchStations } from "$lib/stations";
+import { base } from "$app/paths";
 import type { PageLoad } from './$types';
 
-async function fetchStationsForNetwork(network: string) {
-  let allStations = await fetchStations();
+// Written by the reconciler into static/shards, see StationShardWriter
+const shardsUrl = `${base}/shards/networks`;
 
-  return allStations.filter((station) => station.properties.network == network.toUpperCase());
+async function fetchStationForNetwork(fetch: typeof window.fetch, network: string, networkId: string) {
+  let indexResponse = await fetch(`${shardsUrl}/${network.toLowerCase()}/index.json`);
+
+  if (!indexResponse.ok) {
+    return await fetchStationFromAllStations(fetch, network, networkId);
+  }
+
+  let index: Record<string, string> = await indexResponse.json();
+  let shard = index[networkId];
+
+  if (!shard) {
+    return undefined;
+  }
+
+  let stationResponse = await fetch(`${shardsUrl}/${network.toLowerCase()}/stations/${shard}.json`);
+
+  return await stationResponse.json();
 }
 
-async function fetchStationForNetwork(network: string, networkId: string) {
-  let stations = await fetchStationsForNetwork(network);
+// Builds without the shards still have every station in static/stations.geojson
+async function fetchStationFromAllStations(fetch: typeof window.fetch, network: string, networkId: string) {
+  let stationsResponse = await fetch(`${base}/stations.geojson`);
+
+  if (!stationsResponse.ok) {
+    return undefined;
+  }
+
+  let allStations = (await stationsResponse.json()).features;
 
-  return stations.find((station) => station.properties.network_id && station.properties.network_id.some((data) => data.value == networkId))
+  return allStations.find((station) => station.properties.network == network.toUpperCase() && station.properties.network_id?.some((data) => data.value == networkId));
 }
 
-export const load: PageLoad = async ({ params }) => {
-  let station = await fetchStationForNetwork(params.network, params.station);
+export const load: PageLoad = async ({ fetch, params }) => {
+  let station = await fetchStationForNetwork(fetch, params.network, params.station);
 
   return {
     params: params,
     station: station,
   };
-};
\ No newline at end of file
+};
@@ -1,21 +1,108 @@
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass
-from geopy import distance
-from typing import NamedTuple, Optional, Self
+from geopy import distance, units
+from typing import Callable, NamedTuple, Optional, Self
+import cProfile
+import contextvars
 import dataclasses
 import enum
+import functools
+import gc
 import geojson
+import gzip
+import hashlib
+import itertools
 import json
+import math
+import mmap
+import numpy as np
+import os
 import pathlib
-import queue
+import pickle
 import shapely
-
-
-@dataclass(frozen=True)
+import struct
+import sys
+import time
+
+from scrapers.normalization import STATION_NORMALIZATION_VERSION, normalize_address_street_address, normalize_plug
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+EARTH_RADIUS_MILES = distance.Distance(kilometers=distance.EARTH_RADIUS).miles
+
+# Below this many candidates the per-call overhead of NumPy costs more than checking the distances one by one
+MIN_BATCHED_DISTANCE_CANDIDATES = 8
+DISTANCE_BLOCK_SIZE = 1024
+
+# Size of the tiles that independent groups of stations are batched into for the worker processes
+PARTITION_TILE_DEGREES = 1.0
+
+# Columns of Parquet feeds that stations are parsed from, leaving out the ones `parse_station` never reads
+PARQUET_FEED_COLUMNS = [
+    "name",
+    "network",
+    "network_id",
+    "normalization_version",
+    "location.latitude",
+    "location.longitude",
+    "address.street_address",
+    "address.city",
+    "address.state",
+    "address.zip_code",
+    "references.list.element.identifier",
+    "references.list.element.system",
+    "source.quality",
+    "source.system",
+    "charging_points.list.element.name",
+    "charging_points.list.element.location.latitude",
+    "charging_points.list.element.location.longitude",
+    "charging_points.list.element.network_id",
+    "charging_points.list.element.references.list.element.identifier",
+    "charging_points.list.element.references.list.element.system",
+    "charging_points.list.element.evses.list.element.network_id",
+    "charging_points.list.element.evses.list.element.plugs.list.element.plug",
+]
+
+# Stations parsed from the feeds are only the same while `parse_station` and the normalization of the scraped items
+# stay the same, so this must be changed along with any change to how stations are parsed
+STATION_PARSE_VERSION = 2
+PARSED_STATION_VERSION = f"{STATION_PARSE_VERSION}.{STATION_NORMALIZATION_VERSION}"
+
+# Reused clusters are only the same as combining them again while the passes stay the same, so this must be
+# changed along with any change to how stations are combined. They are also tied to `PARSED_STATION_VERSION`.
+RECONCILE_STATE_VERSION = 3
+
+# Stations are clustered on the map up to this zoom level, and tiles are built up to the maximum which the map
+# overzooms beyond. The cell size is in tile units out of the extent, so 64 pixels on a 512 pixel tile.
+STATION_CLUSTER_MAX_ZOOM = 11
+STATION_TILE_MAX_ZOOM = 14
+STATION_CLUSTER_CELL_SIZE = 512
+VECTOR_TILE_EXTENT = 4096
+VECTOR_TILE_BUFFER = 64
+PMTILES_HEADER_SIZE = 127
+
+
+@dataclass(frozen=True, slots=True)
 class Location:
     latitude: int
     longitude: int
 
+    def __reduce__(self):
+        # Much quicker to pickle than the state of a frozen dataclass, there are a lot of locations to pass around
+        return (Location, (self.latitude, self.longitude))
+
     @property
     def coordinates(self):
         return (self.latitude, self.longitude)
@@ -35,6 +122,9 @@ class PlugType(enum.Enum):
     CHADEMO = enum.auto()
     NACS = enum.auto()
 
+    # Members are singletons compared by identity, so hashing them the same way is equivalent but much quicker
+    __hash__ = object.__hash__
+
 
 class ChargingNetwork(enum.Enum):
     ABM = enum.auto()
@@ -72,12 +162,36 @@ class SourceLocationQualityScore(enum.Enum):
     PARTNER = 20
     AGGREGATED = 10
 
+    # Hashed for every sourced value when attributes are extended, see `PlugType`
+    __hash__ = object.__hash__
+
+
+class ReferenceSource(enum.IntFlag):
+    """
+    The sources a station is referenced by, combined into the `references` bitmask
+    of its summary.
+    """
+
+    OPEN_STREET_MAP = 1
+    OPEN_CHARGE_MAP = 2
+    ALTERNATIVE_FUELS_DATA_CENTER = 4
+
 
 class SourceLocation(NamedTuple):
     system: str
     quality: SourceLocationQualityScore
 
 
+@functools.cache
+def intern_source_location(system: str, quality: SourceLocationQualityScore) -> SourceLocation:
+    """
+    Returns a single shared `SourceLocation` for every system and quality, since
+    there are only a few dozen of them across every scraped station.
+    """
+
+    return SourceLocation(system=sys.intern(system), quality=quality)
+
+
 class SourcedValue[T](NamedTuple):
     source: SourceLocation
     value: T
@@ -87,59 +201,143 @@ class SourcedValue[T](NamedTuple):
 
 
 class SourcedAttribute[T]:
-    values: set[SourcedValue[T]]
+    """
+    The values of an attribute along with the source of each of them.
+
+    Instead of a set of `SourcedValue`, the sources and values are kept as two
+    parallel tuples, which are empty or hold a single value for most attributes.
+    The tuples are never changed in place, so merged attributes can share them.
+
+    The resolved value is cached the first time it is read, since the combining
+    passes read the same attributes many times, and is only cleared when a value
+    is added through `set` or `extend`.
+    """
+
+    __slots__ = ("multiple", "sources", "source_values", "sorted_values", "resolved")
+
     multiple: bool
+    sources: tuple[SourceLocation, ...]
+    source_values: tuple[T, ...]
+    sorted_values: list[T] | None
+    resolved: T | None
 
     def __init__(self, multiple=False):
-        self.values = set()
         self.multiple = multiple
+        self.sources = ()
+        self.source_values = ()
+        self.sorted_values = None
+        self.resolved = None
 
     def __repr__(self):
         return f"<SourcedAttribute({self.values!r})>"
 
+    def __getstate__(self):
+        return (self.multiple, self.sources, self.source_values)
+
+    def __setstate__(self, state):
+        self.multiple, self.sources, self.source_values = state
+        self.invalidate()
+
+    @property
+    def values(self) -> set[SourcedValue[T]]:
+        return set(map(SourcedValue, self.sources, self.source_values))
+
+    def invalidate(self):
+        self.sorted_values = None
+        self.resolved = None
+
     def set(self, value: SourcedValue[T]):
         if not value.value:
             return
 
-        self.values.add(value)
+        if (value.source, value.value) in zip(self.sources, self.source_values):
+            return
+
+        self.sources += (value.source, )
+        self.source_values += (value.value, )
+
+        self.invalidate()
 
     def get(self) -> T:
+        if self.sorted_values is None:
+            self.sorted_values = sorted(set(self.source_values))
+
         if self.multiple:
-            return sorted(set(self.all()))
+            # The cached list is copied so callers can't change it underneath other readers
+            return list(self.sorted_values)
 
-        if not self.values:
-            return ""
+        if self.resolved is None:
+            if not self.sorted_values:
+                self.resolved = ""
+            elif not isinstance(self.sorted_values[0], str):
+                self.resolved = self.sorted_values[0]
+            else:
+                self.resolved = ";".join(self.sorted_values)
 
-        raw_values = list(sorted(set(self.all())))
+        return self.resolved
 
-        if not isinstance(raw_values[0], str):
-            return raw_values[0]
+    def all(self) -> list[T]:
+        return list(self.source_values)
 
-        return ";".join(raw_values)
+    def extend(self, other: Self):
+        if not self.sources:
+            self.sources = other.sources
+            self.source_values = other.source_values
 
-    def all(self) -> list[T]:
-        if not self.values:
-            return []
+            # The other attribute has the same values, so whatever it already resolved can be shared too
+            self.sorted_values = other.sorted_values
+            self.resolved = other.resolved
 
-        return [val.value for val in self.values]
+            return
 
-    def extend(self, other: Self):
-        self.values.update(other.values)
+        existing_values = set(zip(self.sources, self.source_values))
 
+        added_sources = []
+        added_values = []
 
-@dataclass
+        for source, source_value in zip(other.sources, other.source_values):
+            if (source, source_value) in existing_values:
+                continue
+
+            existing_values.add((source, source_value))
+
+            added_sources.append(source)
+            added_values.append(source_value)
+
+        # Extending the tuples once instead of for every value keeps merging large stations linear
+        if added_sources:
+            self.sources += tuple(added_sources)
+            self.source_values += tuple(added_values)
+
+            self.invalidate()
+
+
+@dataclass(frozen=True, slots=True)
 class ChargingPort:
     plug: PlugType
 
+    def __reduce__(self):
+        return (intern_charging_port, (self.plug, ))
 
-@dataclass
+
+@functools.cache
+def intern_charging_port(plug: PlugType) -> ChargingPort:
+    """
+    Returns a single shared `ChargingPort` for every plug type. Ports are compared
+    and hashed by their plug, so they can be deduplicated with sets.
+    """
+
+    return ChargingPort(plug=plug)
+
+
+@dataclass(slots=True)
 class ChargingPortGroup:
     charging_ports: list[ChargingPort] = dataclasses.field(default_factory=list)
 
     network_id: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ChargingPoint:
     charging_port_groups: list[ChargingPortGroup] = dataclasses.field(default_factory=list)
 
@@ -153,7 +351,7 @@ class ChargingPoint:
     network_id: SourcedAttribute[str] = dataclasses.field(default_factory=SourcedAttribute)
 
 
-@dataclass
+@dataclass(slots=True)
 class Station:
     charging_points: list[ChargingPoint] = dataclasses.field(default_factory=list)
 
@@ -172,26 +370,458 @@ class Station:
 
     network_id: SourcedAttribute[str] = dataclasses.field(default_factory=SourcedAttribute)
 
+    # Hash of the scraped record the station was parsed from, merged stations don't have one
+    record_hash: bytes = dataclasses.field(default=b"", repr=False, compare=False)
+
+    _features: Optional["StationFeatures"] = dataclasses.field(default=None, init=False, repr=False, compare=False)
+
+    def __getstate__(self):
+        # The features are quick to build again, so they are left out when stations are pickled
+        return {name: getattr(self, name) for name in self.__slots__ if name != "_features"}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+        self._features = None
+
+    @property
+    def features(self) -> "StationFeatures":
+        """
+        The values the reconciliation checks compare, built the first time they are
+        needed. Stations are filled in right after being created and never changed
+        afterwards, apart from their network, which is why it isn't part of them.
+        """
+
+        if self._features is None:
+            self._features = StationFeatures.from_station(self)
+
+        return self._features
+
+
+@dataclass(frozen=True, eq=False, slots=True)
+class StationFeatures:
+    locations: tuple[Location, ...]
+    # Latitude and longitude of the locations in radians, as an array of shape `(locations, 2)`
+    coordinates: np.ndarray
+
+    street_addresses: frozenset[str]
+
+    osm_ids: frozenset[str]
+    ocm_ids: frozenset[int]
+    nrel_ids: frozenset[int]
+
+    network_ids: frozenset[str]
+
+    @classmethod
+    def from_station(cls, station: Station) -> Self:
+        locations = tuple(station.location.all())
+
+        coordinates = np.radians(np.array([location.coordinates for location in locations], dtype=float).reshape(-1, 2))
+        coordinates.flags.writeable = False
+
+        return cls(
+            locations=locations,
+            coordinates=coordinates,
+            street_addresses=frozenset(map(str.lower, station.street_address.all())),
+            osm_ids=frozenset(station.osm_id.all()),
+            ocm_ids=frozenset(station.ocm_id.all()),
+            nrel_ids=frozenset(station.nrel_id.all()),
+            network_ids=frozenset(map(str.lower, station.network_id.all())),
+        )
+
+    @classmethod
+    def combine(cls, all_features: list[Self]) -> Self:
+        """
+        Returns the features of a group of stations all at once, with each of their
+        locations only kept once.
+        """
+
+        locations = tuple(dict.fromkeys(itertools.chain.from_iterable(features.locations for features in all_features)))
+
+        coordinates = np.radians(np.array([location.coordinates for location in locations], dtype=float).reshape(-1, 2))
+        coordinates.flags.writeable = False
+
+        return cls(
+            locations=locations,
+            coordinates=coordinates,
+            street_addresses=frozenset().union(*(features.street_addresses for features in all_features)),
+            osm_ids=frozenset().union(*(features.osm_ids for features in all_features)),
+            ocm_ids=frozenset().union(*(features.ocm_ids for features in all_features)),
+            nrel_ids=frozenset().union(*(features.nrel_ids for features in all_features)),
+            network_ids=frozenset().union(*(features.network_ids for features in all_features)),
+        )
+
+    def merge(self, other: Self) -> Self:
+        """
+        Returns the features of the station merged from both stations. Locations found
+        by both of them are kept twice, which doesn't change any of the distances.
+        """
+
+        coordinates = np.concatenate([self.coordinates, other.coordinates])
+        coordinates.flags.writeable = False
+
+        return StationFeatures(
+            locations=self.locations + other.locations,
+            coordinates=coordinates,
+            street_addresses=self.street_addresses | other.street_addresses,
+            osm_ids=self.osm_ids | other.osm_ids,
+            ocm_ids=self.ocm_ids | other.ocm_ids,
+            nrel_ids=self.nrel_ids | other.nrel_ids,
+            network_ids=self.network_ids | other.network_ids,
+        )
+
+
+def great_circle_miles(first_coordinates: np.ndarray, second_coordinates: np.ndarray) -> np.ndarray:
+    """
+    Returns the great-circle distance in miles between every pair of coordinates
+    from `StationFeatures`, as an array of shape `(len(first), len(second))`.
+
+    This is the same spherical formula used by geopy's `great_circle`, so the
+    distances match the ones the checks used to get from it.
+    """
+
+    return great_circle_miles_pairwise(first_coordinates[:, np.newaxis, :], second_coordinates[np.newaxis, :, :])
+
+
+def great_circle_miles_pairwise(first_coordinates: np.ndarray, second_coordinates: np.ndarray) -> np.ndarray:
+    """
+    Returns the great-circle distance in miles between each coordinate and the one
+    at the same position in the other array, broadcasting them against each other.
+    """
+
+    first_latitudes, first_longitudes = first_coordinates[..., 0], first_coordinates[..., 1]
+    second_latitudes, second_longitudes = second_coordinates[..., 0], second_coordinates[..., 1]
+
+    sin_first_latitudes, cos_first_latitudes = np.sin(first_latitudes), np.cos(first_latitudes)
+    sin_second_latitudes, cos_second_latitudes = np.sin(second_latitudes), np.cos(second_latitudes)
+
+    delta_longitudes = second_longitudes - first_longitudes
+    sin_delta_longitudes, cos_delta_longitudes = np.sin(delta_longitudes), np.cos(delta_longitudes)
+
+    central_angles = np.arctan2(
+        np.sqrt(
+            (cos_second_latitudes * sin_delta_longitudes) ** 2 +
+            (cos_first_latitudes * sin_second_latitudes - sin_first_latitudes * cos_second_latitudes * cos_delta_longitudes) ** 2
+        ),
+        sin_first_latitudes * sin_second_latitudes + cos_first_latitudes * cos_second_latitudes * cos_delta_longitudes,
+    )
+
+    return units.miles(kilometers=distance.EARTH_RADIUS * central_angles)
+
 
-def get_station_distance(first_station: Station, second_station: Station) -> distance.Distance:
-    first_locations = first_station.location.all()
-    second_locations = second_station.location.all()
+def great_circle_miles_between(first_location: Location, second_location: Location) -> float:
+    """
+    Scalar version of `great_circle_miles` for a single pair of locations, which is
+    faster than going through NumPy when there are only a few locations to compare.
+    """
 
-    lowest_station_distance = distance.Distance(miles=2**8)
+    first_latitude, first_longitude = math.radians(first_location.latitude), math.radians(first_location.longitude)
+    second_latitude, second_longitude = math.radians(second_location.latitude), math.radians(second_location.longitude)
 
-    for first_location in first_locations:
-        for second_location in second_locations:
-            first_coordinates = first_location.coordinates
-            second_coordinates = second_location.coordinates
+    sin_first_latitude, cos_first_latitude = math.sin(first_latitude), math.cos(first_latitude)
+    sin_second_latitude, cos_second_latitude = math.sin(second_latitude), math.cos(second_latitude)
 
-            station_distance = distance.great_circle(first_coordinates, second_coordinates)
+    delta_longitude = second_longitude - first_longitude
+    sin_delta_longitude, cos_delta_longitude = math.sin(delta_longitude), math.cos(delta_longitude)
 
-            if station_distance.miles < lowest_station_distance.miles:
-                lowest_station_distance = station_distance
+    central_angle = math.atan2(
+        math.sqrt(
+            (cos_second_latitude * sin_delta_longitude) ** 2 +
+            (cos_first_latitude * sin_second_latitude - sin_first_latitude * cos_second_latitude * cos_delta_longitude) ** 2
+        ),
+        sin_first_latitude * sin_second_latitude + cos_first_latitude * cos_second_latitude * cos_delta_longitude,
+    )
+
+    return units.miles(kilometers=distance.EARTH_RADIUS * central_angle)
+
+
+def get_station_distance_miles(first_station: Station, second_station: Station) -> float:
+    lowest_station_distance = 2**8
+
+    for first_location in first_station.features.locations:
+        for second_location in second_station.features.locations:
+            lowest_station_distance = min(lowest_station_distance, great_circle_miles_between(first_location, second_location))
 
     return lowest_station_distance
 
 
+def stations_within_distance(first_station: Station, second_station: Station, max_distance_miles: float) -> bool:
+    return get_station_distance_miles(first_station, second_station) <= max_distance_miles
+
+
+def keys_within_distance(coordinates: np.ndarray, coordinates_by_key: dict[int, np.ndarray], candidate_keys, max_distance_miles: float) -> set[int]:
+    """
+    Returns the candidate keys with any of their coordinates within the distance of
+    any of `coordinates`, using a single batched distance calculation. Small sets
+    of candidates are returned as they are for the checks to compare.
+    """
+
+    candidate_keys = [key for key in candidate_keys if len(coordinates_by_key[key])]
+
+    if not candidate_keys or not len(coordinates):
+        return set()
+
+    if len(candidate_keys) < MIN_BATCHED_DISTANCE_CANDIDATES:
+        return set(candidate_keys)
+
+    candidate_coordinates = [coordinates_by_key[key] for key in candidate_keys]
+    candidate_distances = great_circle_miles(coordinates, np.concatenate(candidate_coordinates)).min(axis=0)
+
+    if len(candidate_distances) != len(candidate_keys):
+        candidate_offsets = list(itertools.accumulate((len(coordinates) for coordinates in candidate_coordinates[:-1]), initial=0))
+        candidate_distances = np.minimum.reduceat(candidate_distances, candidate_offsets)
+
+    return set(itertools.compress(candidate_keys, (candidate_distances <= max_distance_miles).tolist()))
+
+
+def coordinates_within_distance(first_coordinates: np.ndarray, second_coordinates: np.ndarray, max_distance_miles: float) -> bool:
+    """
+    Returns whether any of the coordinates are within the distance of each other,
+    comparing a block of them at a time so large groups of stations don't need the
+    whole distance matrix.
+    """
+
+    for block_start in range(0, len(first_coordinates), DISTANCE_BLOCK_SIZE):
+        block_coordinates = first_coordinates[block_start:block_start + DISTANCE_BLOCK_SIZE]
+
+        if len(second_coordinates) and great_circle_miles(block_coordinates, second_coordinates).min() <= max_distance_miles:
+            return True
+
+    return False
+
+
+class LocationGridIndex:
+    """
+    Grid hash over the locations of stations, used to only compare stations that
+    could be within `max_distance_miles` of each other.
+
+    The cells are sized so that every station within the distance is returned by
+    `candidates`, along with some that are slightly further away, so the checks
+    must still compare the actual distance.
+    """
+
+    def __init__(self, max_distance_miles: float):
+        # Pad the search radius so floating point rounding never drops a station right on the threshold
+        self.max_distance_miles = max_distance_miles * 1.01
+        self.max_distance_radians = self.max_distance_miles / EARTH_RADIUS_MILES
+        self.cell_size = max(math.degrees(self.max_distance_radians), 1e-6)
+
+        self.cells: dict[tuple[int, int], set[int]] = defaultdict(set)
+        self.station_cells: dict[int, set[tuple[int, int]]] = {}
+        self.station_coordinates: dict[int, np.ndarray] = {}
+
+    def cell_for_coordinates(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def add(self, station_key: int, station: Station):
+        self.add_features(station_key, station.features)
+
+    def add_features(self, station_key: int, features: "StationFeatures"):
+        station_cells = set(self.cell_for_coordinates(*location.coordinates) for location in features.locations)
+
+        for cell in station_cells:
+            self.cells[cell].add(station_key)
+
+        self.station_cells[station_key] = station_cells
+        self.station_coordinates[station_key] = features.coordinates
+
+    def remove(self, station_key: int):
+        for cell in self.station_cells.pop(station_key):
+            self.cells[cell].discard(station_key)
+
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+        del self.station_coordinates[station_key]
+
+    def candidates(self, station: Station) -> set[int]:
+        """
+        Returns the keys of the stations in the cells near the station, narrowed down
+        to the ones within the distance when there are enough of them to batch.
+        """
+
+        candidate_keys = self.nearby_keys(station.features)
+
+        if not candidate_keys:
+            return set()
+
+        return keys_within_distance(station.features.coordinates, self.station_coordinates, candidate_keys, self.max_distance_miles)
+
+    def nearby_keys(self, features: "StationFeatures") -> set[int]:
+        candidate_keys = set()
+
+        for location in features.locations:
+            cell_ranges = self.cell_ranges_near(location.latitude, location.longitude)
+
+            if cell_ranges is None:
+                return set(self.station_cells.keys())
+
+            for latitude_cells, longitude_cells in cell_ranges:
+                for cell in itertools.product(latitude_cells, longitude_cells):
+                    if cell in self.cells:
+                        candidate_keys.update(self.cells[cell])
+
+        return candidate_keys
+
+    def cell_ranges_near(self, latitude: float, longitude: float) -> Optional[list[tuple[range, range]]]:
+        latitude_delta = math.degrees(self.max_distance_radians)
+        latitude_cosine = math.cos(math.radians(min(abs(latitude) + latitude_delta, 90)))
+
+        # Close to the poles every longitude is within the distance
+        if math.sin(self.max_distance_radians) >= latitude_cosine:
+            return None
+
+        longitude_delta = math.degrees(math.asin(math.sin(self.max_distance_radians) / latitude_cosine))
+
+        min_latitude_cell, min_longitude_cell = self.cell_for_coordinates(latitude - latitude_delta, longitude - longitude_delta)
+        max_latitude_cell, max_longitude_cell = self.cell_for_coordinates(latitude + latitude_delta, longitude + longitude_delta)
+
+        latitude_cells = range(min_latitude_cell, max_latitude_cell + 1)
+        longitude_cells = [range(min_longitude_cell, max_longitude_cell + 1)]
+
+        # Wrap around the antimeridian
+        if longitude - longitude_delta < -180:
+            longitude_cells.append(range(self.cell_for_coordinates(0, longitude - longitude_delta + 360)[1], self.cell_for_coordinates(0, 180)[1] + 1))
+        elif longitude + longitude_delta > 180:
+            longitude_cells.append(range(self.cell_for_coordinates(0, -180)[1], self.cell_for_coordinates(0, longitude + longitude_delta - 360)[1] + 1))
+
+        if len(latitude_cells) * sum(map(len, longitude_cells)) > len(self.cells):
+            return None
+
+        return [(latitude_cells, cells) for cells in longitude_cells]
+
+
+class StreetAddressIndex:
+    """
+    Blocking index of stations by their lowercased street addresses, and their
+    network when `include_network` is set, used to only compare stations that share
+    an address.
+
+    When `max_distance_miles` is set, stations sharing an address but further apart
+    than it are left out.
+    """
+
+    def __init__(self, include_network: bool = False, max_distance_miles: Optional[float] = None):
+        self.include_network = include_network
+        # Padded the same way as the location grid, the checks compare the exact distance
+        self.max_distance_miles = max_distance_miles * 1.01 if max_distance_miles is not None else None
+
+        self.buckets: dict[tuple, set[int]] = defaultdict(set)
+        self.stations: dict[int, Station] = {}
+        self.station_coordinates: dict[int, np.ndarray] = {}
+
+    def bucket_keys(self, station: Station) -> list[tuple]:
+        network = station.network if self.include_network else None
+
+        return [(network, street_address) for street_address in station.features.street_addresses]
+
+    def add(self, station_key: int, station: Station):
+        self.stations[station_key] = station
+        self.station_coordinates[station_key] = station.features.coordinates
+
+        for bucket_key in self.bucket_keys(station):
+            self.buckets[bucket_key].add(station_key)
+
+    def remove(self, station_key: int):
+        station = self.stations.pop(station_key)
+
+        for bucket_key in self.bucket_keys(station):
+            self.buckets[bucket_key].discard(station_key)
+
+            if not self.buckets[bucket_key]:
+                del self.buckets[bucket_key]
+
+        del self.station_coordinates[station_key]
+
+    def candidates(self, station: Station) -> set[int]:
+        candidate_keys = set()
+
+        for bucket_key in self.bucket_keys(station):
+            if bucket_key in self.buckets:
+                candidate_keys.update(self.buckets[bucket_key])
+
+        if self.max_distance_miles is None or not candidate_keys:
+            return candidate_keys
+
+        return keys_within_distance(station.features.coordinates, self.station_coordinates, candidate_keys, self.max_distance_miles)
+
+
+class StationTable:
+    """
+    The locations of a list of stations as arrays, for finding every pair of stations
+    near each other with array operations instead of looking each station up in a
+    `LocationGridIndex`. It is built from the stations of a single pass.
+    """
+
+    def __init__(self, stations: list[Station]):
+        self.stations = stations
+
+    @functools.cached_property
+    def location_coordinates(self) -> np.ndarray:
+        """
+        Coordinates of every location of every station, in radians, as an array of
+        shape `(locations, 2)` like the ones of `StationFeatures`.
+        """
+
+        return np.concatenate([station.features.coordinates for station in self.stations] or [np.empty((0, 2))])
+
+    @functools.cached_property
+    def location_stations(self) -> np.ndarray:
+        """
+        Key of the station each row of `location_coordinates` belongs to.
+        """
+
+        location_counts = [len(station.features.coordinates) for station in self.stations]
+
+        return np.repeat(np.arange(len(self.stations)), location_counts)
+
+    def pairs_within_distance(self, max_distance_miles: float) -> np.ndarray:
+        """
+        Returns the keys of every pair of stations with any of their locations within
+        the distance of each other, as an array of shape `(pairs, 2)` with the lower
+        key first, sorted by the first key and then the second.
+
+        The distance is padded the same way as `LocationGridIndex`, so the checks must
+        still compare the exact distance.
+        """
+
+        max_distance_miles = max_distance_miles * 1.01
+        max_distance_radians = max_distance_miles / EARTH_RADIUS_MILES
+
+        # Locations within the distance are never further apart than it in latitude alone, so only the window of
+        # locations following each one in latitude order needs to be compared with it
+        location_order = np.argsort(self.location_coordinates[:, 0], kind="stable")
+        sorted_coordinates = self.location_coordinates[location_order]
+        sorted_stations = self.location_stations[location_order]
+
+        window_ends = np.searchsorted(sorted_coordinates[:, 0], sorted_coordinates[:, 0] + max_distance_radians, side="right")
+
+        pair_keys = []
+
+        for block_start in range(0, len(sorted_coordinates), DISTANCE_BLOCK_SIZE):
+            block_locations = np.arange(block_start, min(block_start + DISTANCE_BLOCK_SIZE, len(sorted_coordinates)))
+            window_sizes = window_ends[block_locations] - block_locations - 1
+
+            first_locations = np.repeat(block_locations, window_sizes)
+            second_locations = first_locations + 1 + np.arange(len(first_locations)) - np.repeat(np.cumsum(window_sizes) - window_sizes, window_sizes)
+
+            within_distance = great_circle_miles_pairwise(sorted_coordinates[first_locations], sorted_coordinates[second_locations]) <= max_distance_miles
+
+            first_stations = sorted_stations[first_locations[within_distance]]
+            second_stations = sorted_stations[second_locations[within_distance]]
+            different_stations = first_stations != second_stations
+
+            first_stations, second_stations = first_stations[different_stations], second_stations[different_stations]
+
+            # Each pair is kept as a single number, which sorts the same as the pair of keys
+            pair_keys.append(np.minimum(first_stations, second_stations) * len(self.stations) + np.maximum(first_stations, second_stations))
+
+        first_keys, second_keys = np.divmod(np.unique(np.concatenate(pair_keys or [np.empty(0, dtype=np.int64)])), max(len(self.stations), 1))
+
+        return np.stack([first_keys, second_keys], axis=1)
+
+
 def merge_stations(first_station: Station, second_station: Station) -> Station:
     combined_station = Station()
 
@@ -239,6 +869,8 @@ def merge_stations(first_station: Station, second_station: Station) -> Station:
 
     combined_station.charging_points = combine_charging_points(first_charging_points, second_charging_points)
 
+    combined_station._features = first_station.features.merge(second_station.features)
+
     return combined_station
 
 
@@ -252,16 +884,11 @@ def combine_charging_points(first_points: list[ChargingPoint], second_points: li
     if not first_points and not second_points:
         return []
 
-    first_network_ids = set(point.network_id.get() for point in first_points if point.network_id.get())
-    second_network_ids = set(point.network_id.get() for point in second_points if point.network_id.get())
-
-    if first_network_ids or second_network_ids:
+    # Only whether any point has a network ID or name matters, so this stops at the first one
+    if any(point.network_id.get() for point in itertools.chain(first_points, second_points)):
         return combine_charging_points_by_id(first_points, second_points)
 
-    first_names = set(point.name for point in first_points if point.name)
-    second_names = set(point.name for point in second_points if point.name)
-
-    if first_names or second_names:
+    if any(point.name for point in itertools.chain(first_points, second_points)):
         return combine_charging_points_by_name(first_points, second_points)
 
     if len(first_points) != len(second_points):
@@ -401,79 +1028,12 @@ def merge_charging_port_groups(first_group: ChargingPortGroup, second_group: Cha
     elif second_group.network_id:
         combined_group.network_id = second_group.network_id
 
-    for charging_port in [*first_group.charging_ports, *second_group.charging_ports]:
-        if charging_port in combined_group.charging_ports:
-            continue
-
-        combined_group.charging_ports.append(charging_port)
+    # Keeps the first of each port in order, the same as checking the ports added so far
+    combined_group.charging_ports = list(dict.fromkeys([*first_group.charging_ports, *second_group.charging_ports]))
 
     return combined_group
 
 
-def normalize_address_street_address(street_address: str) -> str:
-    STREET_TYPE_MAP = {
-        "ave": "Avenue",
-        "blvd": "Boulevard",
-        "cir": "Circle",
-        "ct": "Court",
-        "dr": "Drive",
-        "expy": "Expressway",
-        "hwy": "Highway",
-        "ln": "Lane",
-        "pl": "Place",
-        "pkwy": "Parkway",
-        "rd": "Road",
-        "st": "Street",
-        "sq": "Square",
-        "tpke": "Turnpike",
-    }
-
-    PREFIX_NUMBER_MAP = {
-        "One": "1",
-    }
-
-    abbreviated_street_names = {
-        "N": "North",
-        "E": "East",
-        "S": "South",
-        "W": "West",
-    }
-
-    if " " in street_address:
-        address_parts = list(filter(None, street_address.split(" ")))
-        street_type = address_parts[-1]
-        is_extension = False
-
-        if street_type.lower().startswith("ext"):
-            street_type = address_parts[-2]
-            del address_parts[-1]
-            is_extension = True
-
-        if street_type.endswith(".") or street_type.endswith(","):
-            street_type = street_type[:-1]
-
-        street_type = street_type.lower()
-
-        if street_type in STREET_TYPE_MAP:
-            address_parts[-1] = STREET_TYPE_MAP[street_type]
-
-        if address_parts[0] in PREFIX_NUMBER_MAP:
-            address_parts[0] = PREFIX_NUMBER_MAP[address_parts[0]]
-
-        if len(address_parts) > 3 and address_parts[1] in list(abbreviated_street_names.keys()):
-            address_parts[1] = abbreviated_street_names[address_parts[1]]
-
-        if is_extension:
-            address_parts.append("Extension")
-
-        street_address = " ".join(address_parts)
-
-    if street_address.endswith(".") or street_address.endswith(","):
-        street_address = street_address[:-1]
-
-    return street_address
-
-
 def guess_charging_point_groups(capacity: int, plug_counts: dict[PlugType, int]) -> list[ChargingPoint]:
     charging_points = []
 
@@ -481,7 +1041,7 @@ def guess_charging_point_groups(capacity: int, plug_counts: dict[PlugType, int])
         for socket_type, socket_count in plug_counts.items():
             for _ in range(socket_count):
                 charging_port_group = ChargingPortGroup(
-                    charging_ports=[ChargingPort(plug=socket_type)]
+                    charging_ports=[intern_charging_port(socket_type)]
                 )
                 charging_point = ChargingPoint(charging_port_groups=[charging_port_group])
                 charging_points.append(charging_point)
@@ -489,7 +1049,7 @@ def guess_charging_point_groups(capacity: int, plug_counts: dict[PlugType, int])
         charging_port_group = ChargingPortGroup()
 
         for socket_type in plug_counts.keys():
-            charging_port = ChargingPort(plug=socket_type)
+            charging_port = intern_charging_port(socket_type)
             charging_port_group.charging_ports.append(charging_port)
 
         charging_point = ChargingPoint(charging_port_groups=[charging_port_group])
@@ -500,7 +1060,7 @@ def guess_charging_point_groups(capacity: int, plug_counts: dict[PlugType, int])
             charging_port_group = ChargingPortGroup()
 
             for plug_type in plug_counts.keys():
-                charging_port = ChargingPort(plug=plug_type)
+                charging_port = intern_charging_port(plug_type)
                 charging_port_group.charging_ports.append(charging_port)
 
             charging_point = ChargingPoint(charging_port_groups=[charging_port_group])
@@ -513,7 +1073,7 @@ def guess_charging_point_groups(capacity: int, plug_counts: dict[PlugType, int])
                 split_count = plug_count // capacity
 
                 for _ in enumerate(range(split_count)):
-                    charging_port = ChargingPort(plug=plug_type)
+                    charging_port = intern_charging_port(plug_type)
                     charging_port_group = ChargingPortGroup(charging_ports=[charging_port])
                     charging_port_groups.append(charging_port_group)
 
@@ -667,665 +1227,2405 @@ def filter_out_non_networked(station: Station):
     return station.network != "NON_NETWORKED"
 
 
-def combine_tesla_superchargers(all_stations: list[Station]) -> list[Station]:
-    def check_tesla_distance(first_station, second_station):
-        station_distance = get_station_distance(first_station, second_station)
+def filter_missing_osm_id(station: Station):
+    return station.features.osm_ids
 
-        return station_distance.miles < 0.1
 
-    def filter_out_non_tesla_supercharger(station):
-        return station.network == "TESLA_SUPERCHARGER"
+def filter_missing_ocm_id(station: Station):
+    return station.features.ocm_ids
 
-    return combine_stations_with_check(all_stations, check_tesla_distance, [filter_out_non_tesla_supercharger])
 
+def filter_missing_nrel_id(station: Station):
+    return station.features.nrel_ids
 
-def combine_networked_stations_at_same_address(all_stations: list[Station]) -> list[Station]:
-    def check_same_address(first_station: Station, second_station: Station) -> bool:
-        if not station_networks_match(first_station, second_station):
-            return False
 
-        first_addresses = set(map(str.lower, first_station.street_address.all()))
-        second_addresses = set(map(str.lower, second_station.street_address.all()))
+def filter_missing_network_id(station: Station):
+    return station.features.network_ids
 
-        if not (first_addresses & second_addresses):
-            return False
 
-        station_distance = get_station_distance(first_station, second_station)
+def station_networks_match(first_station: Station, second_station: Station) -> bool:
+    if first_station.network is None or first_station.network == "NON_NETWORKED":
+        return False
 
-        if station_distance.miles > 0.5:
-            return False
+    if second_station.network is None or second_station.network == "NON_NETWORKED":
+        return False
 
-        return True
+    return first_station.network == second_station.network
 
-    def filter_missing_address(station):
-        return station.street_address.all()
+def combine_stations_with_check(all_stations: list[Station], check, pre_filters=[], index=None) -> list[Station]:
+    combined_stations, selected_stations = split_stations_by_filters(all_stations, pre_filters)
 
-    return combine_stations_with_check(all_stations, check_same_address, [filter_out_non_networked, filter_out_unknown_network, filter_missing_address])
+    stations_to_check = deque()
+    remaining_stations: dict[int, Station] = {}
+    station_keys = itertools.count()
 
-def combine_networked_stations_near_known_address(all_stations: list[Station]) -> list[Station]:
-    def check_same_address(first_station: Station, second_station: Station) -> bool:
-        if not station_networks_match(first_station, second_station):
-            return False
+    candidate_pairs = 0
+    check_calls = 0
+    merges = 0
 
-        first_addresses = set(map(str.lower, first_station.street_address.all()))
-        second_addresses = set(map(str.lower, second_station.street_address.all()))
+    def add_remaining_station(station: Station):
+        station_key = next(station_keys)
 
-        if not first_addresses and not second_addresses:
-            return False
+        stations_to_check.append(station_key)
+        remaining_stations[station_key] = station
 
-        if first_addresses and second_addresses:
-            return False
+        if index is not None:
+            index.add(station_key, station)
 
-        station_distance = get_station_distance(first_station, second_station)
+    for station in selected_stations:
+        add_remaining_station(station)
 
-        if station_distance.miles > 0.05:
-            return False
+    while stations_to_check:
+        first_key = stations_to_check.popleft()
 
-        return True
+        if first_key not in remaining_stations:
+            continue
 
-    return combine_stations_with_check(all_stations, check_same_address, [filter_out_non_networked, filter_out_unknown_network])
+        first_station = remaining_stations.pop(first_key)
 
-def combine_networked_stations_close_by(all_stations: list[Station]) -> list[Station]:
-    def check_close_location(first_station: Station, second_station: Station) -> bool:
-        if not station_networks_match(first_station, second_station):
-            return False
+        # Keys are handed out in order, so sorting the candidates keeps the same comparison order as a full scan
+        if index is not None:
+            index.remove(first_key)
+            candidate_keys = sorted(index.candidates(first_station))
+        else:
+            candidate_keys = remaining_stations.keys()
 
-        first_addresses = set(map(str.lower, first_station.street_address.all()))
-        second_addresses = set(map(str.lower, second_station.street_address.all()))
+        candidate_pairs += len(candidate_keys)
 
-        if first_addresses or second_addresses:
-            return False
+        for second_key in candidate_keys:
+            second_station = remaining_stations[second_key]
 
-        station_distance = get_station_distance(first_station, second_station)
+            check_calls += 1
 
-        if station_distance.miles > 0.01:
-            return False
+            if not check(first_station, second_station):
+                continue
 
-        return True
+            combined_station = merge_stations(first_station, second_station)
+            merges += 1
 
-    return combine_stations_with_check(all_stations, check_close_location, [filter_out_non_networked, filter_out_unknown_network])
+            del remaining_stations[second_key]
 
-def combine_non_networked_stations_at_same_address(all_stations: list[Station]) -> list[Station]:
-    def check_same_address(first_station: Station, second_station: Station) -> bool:
-        first_addresses = set(map(str.lower, first_station.street_address.all()))
-        second_addresses = set(map(str.lower, second_station.street_address.all()))
+            if index is not None:
+                index.remove(second_key)
 
-        if not first_addresses and not second_addresses:
-            return False
+            add_remaining_station(combined_station)
 
-        if first_addresses and second_addresses:
-            return False
+            break
+        else:
+            combined_stations.append(first_station)
 
-        station_distance = get_station_distance(first_station, second_station)
+    # Candidates are only checked until one of them is merged, so fewer checks are run than pairs put forward
+    count_pass_work(candidate_pairs=candidate_pairs, check_calls=check_calls, merges=merges)
 
-        if station_distance.miles > 0.1:
-            return False
+    return combined_stations
 
-        return True
 
-    return combine_stations_with_check(all_stations, check_same_address, [filter_out_networked])
+class DisjointSet:
+    """
+    Union-find over the keys `0..size - 1`, used to group stations into clusters
+    of stations that should be merged together.
+    """
 
-def combine_non_networked_stations_close_by(all_stations: list[Station]) -> list[Station]:
-    def check_non_networked_close_by(first_station: Station, second_station: Station) -> bool:
-        station_distance = get_station_distance(first_station, second_station)
+    def __init__(self, size: int):
+        self.parents = list(range(size))
+        self.sizes = [1] * size
 
-        if station_distance.miles > 0.01:
-            return False
+    def find(self, key: int) -> int:
+        while self.parents[key] != key:
+            self.parents[key] = self.parents[self.parents[key]]
+            key = self.parents[key]
 
-        return True
+        return key
 
-    return combine_stations_with_check(all_stations, check_non_networked_close_by, [filter_out_networked])
+    def union(self, first_key: int, second_key: int):
+        first_root = self.find(first_key)
+        second_root = self.find(second_key)
 
-def combine_networked_stations_with_unknown_ones_near_by(all_stations: list[Station]) -> list[Station]:
-    def check_unknown_networked_close_by(first_station: Station, second_station: Station) -> bool:
-        if first_station.network is not None and second_station.network is not None:
-            return False
+        if first_root == second_root:
+            return
 
-        if first_station.network is None and second_station.network is None:
-            return False
+        if self.sizes[first_root] < self.sizes[second_root]:
+            first_root, second_root = second_root, first_root
 
-        station_distance = get_station_distance(first_station, second_station)
+        self.parents[second_root] = first_root
+        self.sizes[first_root] += self.sizes[second_root]
 
-        if station_distance.miles > 0.01:
-            return False
+    def groups(self) -> list[list[int]]:
+        """
+        Returns the keys of every group in ascending order, with the groups ordered
+        by their lowest key.
+        """
 
-        return True
+        root_groups = defaultdict(list)
 
-    return combine_stations_with_check(all_stations, check_unknown_networked_close_by, [filter_out_non_networked])
+        for key in range(len(self.parents)):
+            root_groups[self.find(key)].append(key)
 
-def combine_non_networked_stations_with_unknown_ones_near_by(all_stations: list[Station]) -> list[Station]:
-    def check_unknown_networked_close_by(first_station: Station, second_station: Station) -> bool:
-        if first_station.network is not None and second_station.network is not None:
-            return False
+        return list(root_groups.values())
 
-        if first_station.network != "NON_NETWORKED" and second_station.network != "NON_NETWORKED":
-            return False
 
-        station_distance = get_station_distance(first_station, second_station)
+def cluster_stations_with_check(all_stations: list[Station], check, pre_filters=[], max_distance_miles: Optional[float] = None) -> list[Station]:
+    """
+    Merges the stations connected by pairs that pass `check` into the same stations,
+    in the same order, as `combine_stations_with_check`.
 
-        if station_distance.miles > 0.01:
-            return False
+    Unlike `combine_stations_with_check`, the check is only ever run against pairs of
+    the original stations, and `merge_connected_stations` replays the merges from
+    those. This is only equivalent when a check that passes for one of the stations
+    in a merged station would also pass for the merged station, such as overlapping
+    identifiers or a distance threshold on its own, and when it doesn't matter which
+    of the two stations is checked against the other.
 
-        return True
+    When the check can only pass for stations within `max_distance_miles` of each
+    other, the pairs of stations it is run on are found all at once from a
+    `StationTable`, in the same order as comparing every pair.
+    """
 
-    return combine_stations_with_check(all_stations, check_unknown_networked_close_by)
+    combined_stations, selected_stations = split_stations_by_filters(all_stations, pre_filters)
 
+    if max_distance_miles is not None:
+        candidate_pairs = StationTable(selected_stations).pairs_within_distance(max_distance_miles).tolist()
+    else:
+        candidate_pairs = itertools.combinations(range(len(selected_stations)), 2)
 
-def station_networks_match(first_station: Station, second_station: Station) -> bool:
-    if first_station.network is None or first_station.network == "NON_NETWORKED":
-        return False
+    neighbours = [set() for _ in selected_stations]
 
-    if second_station.network is None or second_station.network == "NON_NETWORKED":
-        return False
+    candidate_pair_count = 0
 
-    return first_station.network == second_station.network
+    for first_key, second_key in candidate_pairs:
+        candidate_pair_count += 1
 
-def combine_stations_with_check(all_stations: list[Station], check, pre_filters=[]) -> list[Station]:
-    combined_stations = []
+        if check(selected_stations[first_key], selected_stations[second_key]):
+            neighbours[first_key].add(second_key)
+            neighbours[second_key].add(first_key)
 
-    stations_to_check = queue.Queue()
-    remaining_stations = []
+    count_pass_work(candidate_pairs=candidate_pair_count, check_calls=candidate_pair_count)
 
-    for station in all_stations:
-        selected_for_check = True
+    combined_stations.extend(merge_connected_stations(selected_stations, neighbours))
 
-        for filter_fn in pre_filters:
-            if not filter_fn(station):
-                selected_for_check = False
+    return combined_stations
 
-                break
 
-        if selected_for_check:
-            stations_to_check.put(station)
-            remaining_stations.append(station)
-        else:
-            combined_stations.append(station)
+def cluster_stations_by_keys(all_stations: list[Station], station_keys, pre_filters=[]) -> list[Station]:
+    """
+    Merges the stations connected by sharing at least one of the keys returned by
+    `station_keys`.
 
-    while not stations_to_check.empty():
-        first_station = stations_to_check.get()
+    This is the same as `cluster_stations_with_check` with a check for overlapping
+    keys, but each station is only looked at once instead of against every other one.
+    """
 
-        if first_station not in remaining_stations:
-            stations_to_check.task_done()
-            continue
+    combined_stations, selected_stations = split_stations_by_filters(all_stations, pre_filters)
 
-        remaining_stations.remove(first_station)
+    stations_for_key: dict = defaultdict(list)
 
-        for second_station in remaining_stations[:]:
-            if not check(first_station, second_station):
-                continue
+    for station_key, station in enumerate(selected_stations):
+        for key in station_keys(station):
+            stations_for_key[key].append(station_key)
 
-            combined_station = merge_stations(first_station, second_station)
+    neighbours = [set() for _ in selected_stations]
 
-            remaining_stations.remove(second_station)
+    for keyed_stations in stations_for_key.values():
+        if len(keyed_stations) > 1:
+            for station_key in keyed_stations:
+                neighbours[station_key].update(keyed_stations)
 
-            stations_to_check.put(combined_station)
-            remaining_stations.append(combined_station)
+    for station_key, station_neighbours in enumerate(neighbours):
+        station_neighbours.discard(station_key)
 
-            stations_to_check.task_done()
+    count_pass_work(candidate_pairs=sum(map(len, neighbours)) // 2)
 
-            break
-        else:
-            combined_stations.append(first_station)
-            stations_to_check.task_done()
+    combined_stations.extend(merge_connected_stations(selected_stations, neighbours))
 
     return combined_stations
 
 
-def combine_matched_stations_by_ids(all_stations: list[Station]) -> list[Station]:
-    def osm_ids_match(first_station: Station, second_station: Station) -> bool:
-        return set(first_station.osm_id.all()) & set(second_station.osm_id.all())
-
-    def ocm_ids_match(first_station: Station, second_station: Station) -> bool:
-        return set(first_station.ocm_id.all()) & set(second_station.ocm_id.all())
+def split_stations_by_filters(all_stations: list[Station], pre_filters) -> tuple[list[Station], list[Station]]:
+    """
+    Returns the stations rejected by any of the filters and the stations selected
+    by all of them, both in their original order.
+    """
 
-    def nrel_ids_match(first_station: Station, second_station: Station) -> bool:
-        return set(first_station.nrel_id.all()) & set(second_station.nrel_id.all())
+    rejected_stations = []
+    selected_stations = []
 
-    def filter_missing_id(id_type: str):
-        def filter_function(station: Station):
-            attr = getattr(station, id_type)
+    for station in all_stations:
+        selected_for_check = True
 
-            return attr.all()
+        for filter_fn in pre_filters:
+            if not filter_fn(station):
+                selected_for_check = False
 
-        return filter_function
+                break
 
-    all_stations = combine_stations_with_check(all_stations, osm_ids_match, [filter_missing_id("osm_id")])
-    all_stations = combine_stations_with_check(all_stations, ocm_ids_match, [filter_missing_id("ocm_id")])
-    all_stations = combine_stations_with_check(all_stations, nrel_ids_match, [filter_missing_id("nrel_id")])
+        if selected_for_check:
+            selected_stations.append(station)
+        else:
+            rejected_stations.append(station)
+
+    return rejected_stations, selected_stations
+
+
+def merge_connected_stations(stations: list[Station], neighbours: list[set[int]]) -> list[Station]:
+    """
+    Merges the stations the same way `combine_stations_with_check` does, given the
+    keys of the stations each one passes the check with: every station is merged
+    with the first remaining station it passes the check with, and the merged
+    station is queued to be checked again after the rest.
+
+    A merged station passes the check with every station that one of the stations
+    merged into it passes it with, so the check never needs to be run on merged
+    stations. Their neighbours are tracked by the cluster of original stations
+    they were merged from instead.
+    """
+
+    clusters = DisjointSet(len(stations))
+
+    # Merged stations get new keys after the original ones, the same as in `combine_stations_with_check`, so the
+    # first remaining station is always the one with the lowest key
+    station_keys = itertools.count(len(stations))
+
+    remaining_stations = dict(enumerate(stations))
+    stations_to_check = deque(range(len(stations)))
+
+    # One of the original stations in each remaining station, and the neighbours and key of each cluster by its root
+    station_members = {station_key: station_key for station_key in range(len(stations))}
+    cluster_neighbours = dict(enumerate(neighbours))
+    cluster_station_keys = {station_key: station_key for station_key in range(len(stations))}
+
+    combined_stations = []
+
+    while stations_to_check:
+        first_key = stations_to_check.popleft()
+
+        if first_key not in remaining_stations:
+            continue
+
+        first_station = remaining_stations.pop(first_key)
+        first_cluster = clusters.find(station_members.pop(first_key))
+        first_neighbours = cluster_neighbours.pop(first_cluster)
+
+        candidate_keys = [
+            cluster_station_keys[cluster]
+            for cluster in {clusters.find(neighbour) for neighbour in first_neighbours}
+            if cluster != first_cluster and cluster_station_keys[cluster] in remaining_stations
+        ]
+
+        if not candidate_keys:
+            combined_stations.append(first_station)
+
+            continue
+
+        second_key = min(candidate_keys)
+        second_cluster = clusters.find(station_members.pop(second_key))
+        second_neighbours = cluster_neighbours.pop(second_cluster)
+
+        combined_station = merge_stations(first_station, remaining_stations.pop(second_key))
+
+        clusters.union(first_cluster, second_cluster)
+        combined_cluster = clusters.find(first_cluster)
+
+        # Adding the smaller set of neighbours to the larger one keeps merging large clusters linear
+        if len(first_neighbours) < len(second_neighbours):
+            first_neighbours, second_neighbours = second_neighbours, first_neighbours
+
+        first_neighbours |= second_neighbours
+
+        combined_key = next(station_keys)
+
+        remaining_stations[combined_key] = combined_station
+        stations_to_check.append(combined_key)
+
+        station_members[combined_key] = combined_cluster
+        cluster_neighbours[combined_cluster] = first_neighbours
+        cluster_station_keys[combined_cluster] = combined_key
+
+    count_pass_work(merges=len(stations) - len(combined_stations))
+
+    return combined_stations
+
+
+def combine_matched_stations_by_ids(all_stations: list[Station]) -> list[Station]:
+    def station_ids(id_type: str):
+        def key_function(station: Station):
+            return getattr(station.features, id_type)
+
+        return key_function
+
+    # Stations without an identifier are filtered out, so they keep their place ahead of the clusters
+    all_stations = cluster_stations_by_keys(all_stations, station_ids("osm_ids"), [filter_missing_osm_id])
+    all_stations = cluster_stations_by_keys(all_stations, station_ids("ocm_ids"), [filter_missing_ocm_id])
+    all_stations = cluster_stations_by_keys(all_stations, station_ids("nrel_ids"), [filter_missing_nrel_id])
+
+    return all_stations
+
+
+def combine_matched_networked_stations_by_network_ids(all_stations: list[Station]) -> list[Station]:
+    # Only known networks make it through the filters, so keying on the network is the same as `station_networks_match`
+    def station_network_ids(station: Station):
+        return [(station.network, network_id) for network_id in station.features.network_ids]
+
+    return cluster_stations_by_keys(all_stations, station_network_ids, [filter_out_non_networked, filter_out_unknown_network, filter_missing_network_id])
+
+
+class NetworkConstraint(enum.Enum):
+    ANY = enum.auto()
+    # Both stations are on the same known network
+    SAME_KNOWN = enum.auto()
+    # Only one of the stations has a network at all
+    ONE_UNKNOWN = enum.auto()
+    # One of the stations has no network and the other is non-networked
+    UNKNOWN_AND_NON_NETWORKED = enum.auto()
+
+
+class AddressConstraint(enum.Enum):
+    ANY = enum.auto()
+    # The stations share at least one street address
+    SHARED = enum.auto()
+    # Only one of the stations has a street address
+    ONLY_ONE = enum.auto()
+    # Neither of the stations has a street address
+    NEITHER = enum.auto()
+
+
+@dataclass(frozen=True)
+class CombineRule:
+    """
+    Declarative pass of `combine_stations`, merging the pairs of stations selected
+    by all of the `pre_filters` that meet the network and address constraints and
+    are within `max_distance_miles` of each other. `plan_combine_rule` compiles the
+    rule into the check and index the pass is run with.
+
+    `predicates` are any other conditions on a pair, and `on_match` is called with a
+    pair just before it is merged. Rules are only `clustered` when every condition
+    that passes for one station in a cluster also passes for the merged cluster.
+    """
+
+    network: NetworkConstraint
+    address: AddressConstraint
+    max_distance_miles: float
+    pre_filters: tuple = ()
+    predicates: tuple = ()
+    inclusive_distance: bool = True
+    clustered: bool = False
+    on_match: Optional[Callable[[Station, Station], None]] = None
+
+
+class NetworkBlockedIndex:
+    """
+    Splits the stations into a separate index for each network, for checks that can
+    only pass for stations on the same network.
+    """
+
+    def __init__(self, make_index: Callable):
+        self.make_index = make_index
+
+        self.indexes: dict[Optional[str], object] = {}
+        self.station_networks: dict[int, Optional[str]] = {}
+
+    def add(self, station_key: int, station: Station):
+        if station.network not in self.indexes:
+            self.indexes[station.network] = self.make_index()
+
+        self.indexes[station.network].add(station_key, station)
+        self.station_networks[station_key] = station.network
+
+    def remove(self, station_key: int):
+        self.indexes[self.station_networks.pop(station_key)].remove(station_key)
+
+    def candidates(self, station: Station) -> set[int]:
+        if station.network not in self.indexes:
+            return set()
+
+        return self.indexes[station.network].candidates(station)
+
+
+def only_one_network_unknown(first_station: Station, second_station: Station) -> bool:
+    return (first_station.network is None) != (second_station.network is None)
+
+
+def unknown_and_non_networked(first_station: Station, second_station: Station) -> bool:
+    if first_station.network is None:
+        return second_station.network == "NON_NETWORKED"
+
+    return second_station.network is None and first_station.network == "NON_NETWORKED"
+
+
+def share_street_address(first_station: Station, second_station: Station) -> bool:
+    return bool(first_station.features.street_addresses & second_station.features.street_addresses)
+
+
+def only_one_has_street_address(first_station: Station, second_station: Station) -> bool:
+    return bool(first_station.features.street_addresses) != bool(second_station.features.street_addresses)
+
+
+def neither_has_street_address(first_station: Station, second_station: Station) -> bool:
+    return not first_station.features.street_addresses and not second_station.features.street_addresses
+
+
+NETWORK_CONSTRAINT_PREDICATES = {
+    NetworkConstraint.SAME_KNOWN: station_networks_match,
+    NetworkConstraint.ONE_UNKNOWN: only_one_network_unknown,
+    NetworkConstraint.UNKNOWN_AND_NON_NETWORKED: unknown_and_non_networked,
+}
+
+ADDRESS_CONSTRAINT_PREDICATES = {
+    AddressConstraint.SHARED: share_street_address,
+    AddressConstraint.ONLY_ONE: only_one_has_street_address,
+    AddressConstraint.NEITHER: neither_has_street_address,
+}
+
+
+def plan_combine_rule(rule: CombineRule) -> tuple[Callable[[Station, Station], bool], Callable]:
+    """
+    Compiles a rule into the check run on each candidate pair of stations, along
+    with a function creating the index that puts the candidates forward.
+
+    The index is built on the most selective condition that can be indexed: shared
+    street addresses are blocked on the address, and the network as well when it
+    has to match. Otherwise stations are looked up by location within the distance,
+    split up by network when it has to match. Conditions the index already ensures
+    are left out of the check, and the rest are run cheapest first, with the
+    distance between the stations always compared last.
+    """
+
+    predicates = []
+
+    if rule.network in NETWORK_CONSTRAINT_PREDICATES:
+        predicates.append(NETWORK_CONSTRAINT_PREDICATES[rule.network])
+
+    if rule.address == AddressConstraint.SHARED:
+        # Every station the address index puts forward shares an address
+        def make_index():
+            return StreetAddressIndex(
+                include_network=rule.network == NetworkConstraint.SAME_KNOWN,
+                max_distance_miles=rule.max_distance_miles,
+            )
+    else:
+        if rule.address in ADDRESS_CONSTRAINT_PREDICATES:
+            predicates.append(ADDRESS_CONSTRAINT_PREDICATES[rule.address])
+
+        if rule.network == NetworkConstraint.SAME_KNOWN:
+            def make_index():
+                return NetworkBlockedIndex(lambda: LocationGridIndex(rule.max_distance_miles))
+        else:
+            def make_index():
+                return LocationGridIndex(rule.max_distance_miles)
+
+    predicates.extend(rule.predicates)
+
+    max_distance_miles = rule.max_distance_miles
+
+    if rule.inclusive_distance:
+        def within_distance(first_station: Station, second_station: Station) -> bool:
+            return stations_within_distance(first_station, second_station, max_distance_miles)
+    else:
+        def within_distance(first_station: Station, second_station: Station) -> bool:
+            return get_station_distance_miles(first_station, second_station) < max_distance_miles
+
+    predicates.append(within_distance)
+
+    on_match = rule.on_match
+
+    def check(first_station: Station, second_station: Station) -> bool:
+        for predicate in predicates:
+            if not predicate(first_station, second_station):
+                return False
+
+        if on_match is not None:
+            on_match(first_station, second_station)
+
+        return True
+
+    return check, make_index
+
+
+def apply_combine_rule(rule: CombineRule, all_stations: list[Station]) -> list[Station]:
+    check, make_index = plan_combine_rule(rule)
+
+    if rule.clustered:
+        # Every condition of a clustered rule is checked against the original stations, so the pairs within the
+        # distance can be found up front instead of through an index
+        return cluster_stations_with_check(all_stations, check, list(rule.pre_filters), rule.max_distance_miles)
+
+    return combine_stations_with_check(all_stations, check, list(rule.pre_filters), make_index())
+
+
+def filter_out_non_tesla_supercharger(station: Station):
+    return station.network == "TESLA_SUPERCHARGER"
+
+
+def filter_missing_address(station: Station):
+    return station.features.street_addresses
+
+
+# Networks the AFDC lists as non-networked, since they don't share their stations with it
+NREL_UNSUPPORTED_NETWORKS = [
+    "AMP_UP",
+    "ENEL_X",
+    "EV_PASSPORT",
+]
+
+
+def nrel_non_networked_with_unsupported_network(first_station: Station, second_station: Station) -> bool:
+    if first_station.network != "NON_NETWORKED" and second_station.network != "NON_NETWORKED":
+        return False
+
+    if first_station.network == "NON_NETWORKED" and second_station.network == "NON_NETWORKED":
+        return False
+
+    if first_station.network not in NREL_UNSUPPORTED_NETWORKS and second_station.network not in NREL_UNSUPPORTED_NETWORKS:
+        return False
+
+    if not first_station.features.nrel_ids and second_station.features.nrel_ids:
+        return False
+
+    return True
+
+
+def force_network_onto_non_networked(first_station: Station, second_station: Station):
+    if first_station.network == "NON_NETWORKED":
+        first_station.network = second_station.network
+    elif second_station.network == "NON_NETWORKED":
+        second_station.network = first_station.network
+
+
+TESLA_SUPERCHARGERS_RULE = CombineRule(
+    network=NetworkConstraint.ANY,
+    address=AddressConstraint.ANY,
+    max_distance_miles=0.1,
+    pre_filters=(filter_out_non_tesla_supercharger, ),
+    inclusive_distance=False,
+    clustered=True,
+)
+
+NREL_NON_NETWORKED_WITH_UNSUPPORTED_NETWORK_RULE = CombineRule(
+    network=NetworkConstraint.ANY,
+    address=AddressConstraint.SHARED,
+    max_distance_miles=0.5,
+    predicates=(nrel_non_networked_with_unsupported_network, ),
+    on_match=force_network_onto_non_networked,
+)
+
+NETWORKED_STATIONS_AT_SAME_ADDRESS_RULE = CombineRule(
+    network=NetworkConstraint.SAME_KNOWN,
+    address=AddressConstraint.SHARED,
+    max_distance_miles=0.5,
+    pre_filters=(filter_out_non_networked, filter_out_unknown_network, filter_missing_address),
+)
+
+NETWORKED_STATIONS_NEAR_KNOWN_ADDRESS_RULE = CombineRule(
+    network=NetworkConstraint.SAME_KNOWN,
+    address=AddressConstraint.ONLY_ONE,
+    max_distance_miles=0.05,
+    pre_filters=(filter_out_non_networked, filter_out_unknown_network),
+)
+
+NETWORKED_STATIONS_CLOSE_BY_RULE = CombineRule(
+    network=NetworkConstraint.SAME_KNOWN,
+    address=AddressConstraint.NEITHER,
+    max_distance_miles=0.01,
+    pre_filters=(filter_out_non_networked, filter_out_unknown_network),
+)
+
+NON_NETWORKED_STATIONS_AT_SAME_ADDRESS_RULE = CombineRule(
+    network=NetworkConstraint.ANY,
+    address=AddressConstraint.ONLY_ONE,
+    max_distance_miles=0.1,
+    pre_filters=(filter_out_networked, ),
+)
+
+NON_NETWORKED_STATIONS_CLOSE_BY_RULE = CombineRule(
+    network=NetworkConstraint.ANY,
+    address=AddressConstraint.ANY,
+    max_distance_miles=0.01,
+    pre_filters=(filter_out_networked, ),
+    clustered=True,
+)
+
+NETWORKED_STATIONS_WITH_UNKNOWN_ONES_NEAR_BY_RULE = CombineRule(
+    network=NetworkConstraint.ONE_UNKNOWN,
+    address=AddressConstraint.ANY,
+    max_distance_miles=0.01,
+    pre_filters=(filter_out_non_networked, ),
+)
+
+NON_NETWORKED_STATIONS_WITH_UNKNOWN_ONES_NEAR_BY_RULE = CombineRule(
+    network=NetworkConstraint.UNKNOWN_AND_NON_NETWORKED,
+    address=AddressConstraint.ANY,
+    max_distance_miles=0.01,
+)
+
+COMBINE_STATION_RULES = [
+    TESLA_SUPERCHARGERS_RULE,
+    NREL_NON_NETWORKED_WITH_UNSUPPORTED_NETWORK_RULE,
+    NETWORKED_STATIONS_AT_SAME_ADDRESS_RULE,
+    NETWORKED_STATIONS_NEAR_KNOWN_ADDRESS_RULE,
+    NETWORKED_STATIONS_CLOSE_BY_RULE,
+    NON_NETWORKED_STATIONS_AT_SAME_ADDRESS_RULE,
+    NON_NETWORKED_STATIONS_CLOSE_BY_RULE,
+    NETWORKED_STATIONS_WITH_UNKNOWN_ONES_NEAR_BY_RULE,
+    NON_NETWORKED_STATIONS_WITH_UNKNOWN_ONES_NEAR_BY_RULE,
+]
+
+# Stations further apart than these can never be merged by any of the rules, so the partitions only need to keep
+# stations together within them. Rules merging stations at a shared address reach further than the rest.
+PARTITION_CLOSE_BY_MILES = max(
+    rule.max_distance_miles for rule in COMBINE_STATION_RULES if rule.address != AddressConstraint.SHARED
+)
+PARTITION_SAME_ADDRESS_MILES = max(
+    rule.max_distance_miles for rule in COMBINE_STATION_RULES if rule.address == AddressConstraint.SHARED
+)
+
+
+def combine_tesla_superchargers(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(TESLA_SUPERCHARGERS_RULE, all_stations)
+
+
+def combine_networked_stations_at_same_address(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NETWORKED_STATIONS_AT_SAME_ADDRESS_RULE, all_stations)
+
+
+def combine_networked_stations_near_known_address(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NETWORKED_STATIONS_NEAR_KNOWN_ADDRESS_RULE, all_stations)
+
+
+def combine_networked_stations_close_by(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NETWORKED_STATIONS_CLOSE_BY_RULE, all_stations)
+
+
+def combine_non_networked_stations_at_same_address(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NON_NETWORKED_STATIONS_AT_SAME_ADDRESS_RULE, all_stations)
+
+
+def combine_non_networked_stations_close_by(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NON_NETWORKED_STATIONS_CLOSE_BY_RULE, all_stations)
+
+
+def combine_networked_stations_with_unknown_ones_near_by(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NETWORKED_STATIONS_WITH_UNKNOWN_ONES_NEAR_BY_RULE, all_stations)
+
+
+def combine_non_networked_stations_with_unknown_ones_near_by(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NON_NETWORKED_STATIONS_WITH_UNKNOWN_ONES_NEAR_BY_RULE, all_stations)
+
+
+def combine_nrel_non_networked_with_unsupported_network_at_same_address(all_stations: list[Station]) -> list[Station]:
+    return apply_combine_rule(NREL_NON_NETWORKED_WITH_UNSUPPORTED_NETWORK_RULE, all_stations)
+
+
+# The passes of `combine_stations`, in the order they are run
+COMBINE_STATION_PASSES = [
+    combine_matched_stations_by_ids,
+    combine_matched_networked_stations_by_network_ids,
+    combine_tesla_superchargers,
+    combine_nrel_non_networked_with_unsupported_network_at_same_address,
+
+    combine_networked_stations_at_same_address,
+    combine_networked_stations_near_known_address,
+    combine_networked_stations_close_by,
+
+    combine_non_networked_stations_at_same_address,
+    combine_non_networked_stations_close_by,
+    combine_networked_stations_with_unknown_ones_near_by,
+    combine_non_networked_stations_with_unknown_ones_near_by,
+]
+
+
+@dataclass
+class PassStatistics:
+    """
+    What a single pass of `combine_stations` did. Candidate pairs are the pairs of
+    stations an index or shared key put forward, and check calls are how many of
+    them the pass actually ran its check on.
+    """
+
+    name: str
+    seconds: float = 0.0
+    stations_in: int = 0
+    stations_out: int = 0
+    candidate_pairs: int = 0
+    check_calls: int = 0
+    merges: int = 0
+
+    def add(self, other: Self):
+        for field in dataclasses.fields(self):
+            if field.name != "name":
+                setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+
+# Statistics of the pass `combine_stations` is running, only while they are being recorded. Being a context variable,
+# runs in other threads or nested inside a pass each count into their own statistics.
+current_pass_statistics: contextvars.ContextVar[Optional[PassStatistics]] = contextvars.ContextVar(
+    "current_pass_statistics",
+    default=None,
+)
+
+
+def count_pass_work(candidate_pairs: int = 0, check_calls: int = 0, merges: int = 0):
+    statistics = current_pass_statistics.get()
+
+    if statistics is None:
+        return
+
+    statistics.candidate_pairs += candidate_pairs
+    statistics.check_calls += check_calls
+    statistics.merges += merges
+
+
+def combine_stations(all_stations: list[Station], statistics: Optional[list[PassStatistics]] = None) -> list[Station]:
+    """
+    Runs every pass over the stations. When a `statistics` list is passed in, the
+    statistics of each pass are appended to it as it is run.
+
+    Passes record their work through `count_pass_work` into the statistics set for
+    them here, so none of them take the statistics themselves.
+    """
+
+    for combine_pass in COMBINE_STATION_PASSES:
+        if statistics is None:
+            all_stations = combine_pass(all_stations)
+
+            continue
+
+        pass_statistics = PassStatistics(name=combine_pass.__name__, stations_in=len(all_stations))
+
+        statistics_token = current_pass_statistics.set(pass_statistics)
+        start_time = time.perf_counter()
+
+        try:
+            all_stations = combine_pass(all_stations)
+        finally:
+            current_pass_statistics.reset(statistics_token)
+
+        pass_statistics.seconds = time.perf_counter() - start_time
+        pass_statistics.stations_out = len(all_stations)
+
+        statistics.append(pass_statistics)
+
+    return all_stations
+
+
+def combine_stations_with_statistics(all_stations: list[Station]) -> tuple[list[Station], list[PassStatistics]]:
+    statistics = []
+
+    return combine_stations(all_stations, statistics), statistics
+
+
+def empty_pass_statistics() -> list[PassStatistics]:
+    """
+    Returns statistics for every pass with nothing recorded yet, for totalling the
+    statistics of the workers in.
+    """
+
+    return [PassStatistics(name=combine_pass.__name__) for combine_pass in COMBINE_STATION_PASSES]
+
+
+def collect_pass_statistics(result, statistics: Optional[list[PassStatistics]]) -> list[Station]:
+    """
+    Returns the stations combined by a worker, adding the statistics it recorded
+    alongside them to the totals in `statistics` when they are being recorded.
+    """
+
+    if statistics is None:
+        return result
+
+    combined_stations, worker_statistics = result
+
+    for total_statistics, pass_statistics in zip(statistics, worker_statistics):
+        total_statistics.add(pass_statistics)
+
+    return combined_stations
+
+
+def combine_stations_partitioned(
+    all_stations: list[Station],
+    processes: Optional[int] = None,
+    statistics: Optional[list[PassStatistics]] = None,
+) -> list[Station]:
+    """
+    Combines the stations the same way as `combine_stations`, but split up into
+    geographic tiles that are combined in a pool of `processes` worker processes,
+    or all of the cores when it isn't set.
+
+    Each tile is closed over every station it could be merged with, so the tiles
+    are stitched back together by joining their results in tile order. Statistics
+    are totalled across the tiles, so their times add up the time of every worker.
+    """
+
+    tiles = partition_stations(all_stations)
+
+    if statistics is not None:
+        statistics.extend(empty_pass_statistics())
+
+    combine = combine_stations if statistics is None else combine_stations_with_statistics
+    combined_stations = []
+
+    if processes == 1:
+        for tile_stations in tiles:
+            combined_stations.extend(collect_pass_statistics(combine(tile_stations), statistics))
+
+        return combined_stations
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for result in executor.map(combine, tiles):
+            combined_stations.extend(collect_pass_statistics(result, statistics))
+
+    return combined_stations
+
+
+def partition_stations(all_stations: list[Station]) -> list[list[Station]]:
+    """
+    Splits the stations into tiles that can be combined independently of each other.
+
+    The groups from `partition_station_groups` are batched into tiles by the location
+    of their first station, so a group that crosses the edge of a tile is kept whole
+    in the tile it starts in.
+
+    The tiles, and the stations within them, keep the order the stations were passed in.
+    """
+
+    tiles: dict[tuple[int, int], list[int]] = defaultdict(list)
+
+    for group_keys in partition_station_groups(all_stations):
+        group_locations = all_stations[group_keys[0]].features.locations
+        tile = (0, 0)
+
+        if group_locations:
+            tile = (
+                math.floor(group_locations[0].latitude / PARTITION_TILE_DEGREES),
+                math.floor(group_locations[0].longitude / PARTITION_TILE_DEGREES),
+            )
+
+        tiles[tile].extend(group_keys)
+
+    return [[all_stations[station_key] for station_key in sorted(tile_keys)] for tile_keys in tiles.values()]
+
+
+def partition_station_groups(all_stations: list[Station]) -> list[list[int]]:
+    """
+    Returns the keys of the stations grouped with every station they could possibly
+    be merged with by any pass: ones sharing an identifier, ones within the close by
+    distance, and ones sharing a street address within the same address distance.
+
+    Combining each group on its own gives the same stations as combining all of them
+    together. The groups are ordered the same way as `DisjointSet.groups`.
+    """
+
+    partitions = DisjointSet(len(all_stations))
+
+    first_station_for_key: dict = {}
+
+    for station_key, station in enumerate(all_stations):
+        features = station.features
+
+        # The network may still be changed by a pass, so network identifiers are joined on their own
+        identifier_keys = itertools.chain(
+            (("osm", osm_id) for osm_id in features.osm_ids),
+            (("ocm", ocm_id) for ocm_id in features.ocm_ids),
+            (("nrel", nrel_id) for nrel_id in features.nrel_ids),
+            (("network", network_id) for network_id in features.network_ids),
+        )
+
+        for identifier_key in identifier_keys:
+            if identifier_key in first_station_for_key:
+                partitions.union(first_station_for_key[identifier_key], station_key)
+            else:
+                first_station_for_key[identifier_key] = station_key
+
+    for first_key, second_key in StationTable(all_stations).pairs_within_distance(PARTITION_CLOSE_BY_MILES).tolist():
+        if partitions.find(first_key) == partitions.find(second_key):
+            continue
+
+        if stations_within_distance(all_stations[first_key], all_stations[second_key], PARTITION_CLOSE_BY_MILES):
+            partitions.union(first_key, second_key)
+
+    # A merged station can share an address through one station and be close by through another, so
+    # the addresses are compared between whole groups until no more of them need to be joined
+    while join_partitions_at_same_address(all_stations, partitions):
+        pass
+
+    return partitions.groups()
+
+
+def join_partitions_at_same_address(all_stations: list[Station], partitions: DisjointSet) -> bool:
+    """
+    Joins the groups of stations that share a street address and are within the
+    same address distance of each other. Returns whether any groups were joined.
+    """
+
+    group_features = {}
+
+    for group_keys in partitions.groups():
+        features = StationFeatures.combine([all_stations[station_key].features for station_key in group_keys])
+
+        # Groups are only ever joined here through an address, so groups without one can be left out
+        if features.street_addresses:
+            group_features[partitions.find(group_keys[0])] = features
+
+    index = LocationGridIndex(PARTITION_SAME_ADDRESS_MILES)
+
+    for group_root, features in group_features.items():
+        index.add_features(group_root, features)
+
+    joined_groups = False
+
+    for first_root, first_features in group_features.items():
+        for second_root in index.nearby_keys(first_features):
+            if second_root <= first_root or partitions.find(first_root) == partitions.find(second_root):
+                continue
+
+            second_features = group_features[second_root]
+
+            if not (first_features.street_addresses & second_features.street_addresses):
+                continue
+
+            if coordinates_within_distance(first_features.coordinates, second_features.coordinates, PARTITION_SAME_ADDRESS_MILES):
+                partitions.union(first_root, second_root)
+                joined_groups = True
+
+    return joined_groups
+
+
+def combine_stations_incremental(
+    all_stations: list[Station],
+    previous_clusters: dict[bytes, list[Station]],
+    processes: Optional[int] = None,
+    statistics: Optional[list[PassStatistics]] = None,
+) -> tuple[list[Station], dict[bytes, list[Station]]]:
+    """
+    Combines the stations the same way as `combine_stations`, reusing the combined
+    stations of every group from `partition_station_groups` whose scraped records
+    are all the same as in the previous run. Only the groups with added, removed or
+    changed records are combined again, in a pool of `processes` worker processes.
+
+    Returns the combined stations along with the clusters to pass in on the next run,
+    keyed by the hash of the records of each group. Statistics only cover the groups
+    that were combined again, so a run that reuses every group reports each pass
+    without any work.
+    """
+
+    group_hashes = []
+    clusters = {}
+    changed_groups = {}
+
+    for group_keys in partition_station_groups(all_stations):
+        group_stations = [all_stations[station_key] for station_key in group_keys]
+        group_hash = hashlib.blake2b(b"".join(station.record_hash for station in group_stations), digest_size=16).digest()
+
+        group_hashes.append(group_hash)
+
+        if group_hash in previous_clusters:
+            clusters[group_hash] = previous_clusters[group_hash]
+        else:
+            changed_groups[group_hash] = group_stations
+
+    if statistics is not None:
+        statistics.extend(empty_pass_statistics())
+
+    combine = combine_stations if statistics is None else combine_stations_with_statistics
+
+    if processes == 1:
+        results = map(combine, changed_groups.values())
+        combined_groups = (collect_pass_statistics(result, statistics) for result in results)
+
+        clusters.update(zip(changed_groups.keys(), combined_groups))
+    elif changed_groups:
+        # Most groups are a handful of stations, so they are sent to the workers in batches
+        chunk_size = max(1, len(changed_groups) // ((processes or os.cpu_count() or 1) * 4))
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = executor.map(combine, changed_groups.values(), chunksize=chunk_size)
+            combined_groups = (collect_pass_statistics(result, statistics) for result in results)
+
+            clusters.update(zip(changed_groups.keys(), combined_groups))
+
+    combined_stations = []
+
+    for group_hash in group_hashes:
+        combined_stations.extend(clusters[group_hash])
+
+    return combined_stations, clusters
+
+
+def load_reconcile_state(state_file: pathlib.Path) -> dict[bytes, list[Station]]:
+    """
+    Returns the clusters saved by the previous run, or none at all when there wasn't
+    one, it can't be read or it was saved by a different version of the reconciliation.
+    """
+
+    try:
+        with state_file.open("rb") as fh:
+            state = pickle.load(fh)
+    except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+        return {}
+
+    if state.get("version") != RECONCILE_STATE_VERSION or state.get("parse_version") != PARSED_STATION_VERSION:
+        return {}
+
+    return state["clusters"]
+
+
+def save_reconcile_state(state_file: pathlib.Path, clusters: dict[bytes, list[Station]]):
+    # Written next to the previous state first, so an interrupted run never leaves a truncated one behind
+    temporary_file = state_file.with_name(f"{state_file.name}.tmp")
+
+    with temporary_file.open("wb") as fh:
+        state = {"version": RECONCILE_STATE_VERSION, "parse_version": PARSED_STATION_VERSION, "clusters": clusters}
+
+        pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    temporary_file.replace(state_file)
+
+
+def write_reconcile_report(
+    report_file: pathlib.Path,
+    stage_seconds: dict[str, float],
+    statistics: list[PassStatistics],
+):
+    """
+    Writes how long each stage of the run took and the statistics of every pass of
+    `combine_stations` as JSON.
+    """
+
+    report = {
+        "stages": stage_seconds,
+        "passes": [dataclasses.asdict(pass_statistics) for pass_statistics in statistics],
+    }
+
+    report_file.write_text(json.dumps(report, indent=2))
+
+
+def sourced_attribute_to_geojson_property(sourced_attribute: SourcedAttribute) -> list:
+    property_values = []
+
+    for sourced_value in sorted(sourced_attribute.values, key=lambda v: (-v.source.quality.value, v.value, v.source.system)):
+        source = sourced_value.source
+
+        property_value = {
+            "value": sourced_value.value,
+            "source": {
+                "name": source.system,
+                "quality": source.quality.name,
+            }
+        }
+
+        property_values.append(property_value)
+
+    return property_values
+
+
+def addresses_from_station(station: Station) -> list:
+    from operator import attrgetter
+
+    addresses = []
+
+    sourced_information: dict[SourceLocation, ] = defaultdict(dict)
+
+    for street_address in sorted(station.street_address.values, key=attrgetter("value")):
+        sourced_information[street_address.source]["street_address"] = street_address.value
+
+    for city in sorted(station.city.values, key=attrgetter("value")):
+        sourced_information[city.source]["city"] = city.value
+
+    for state in sorted(station.state.values, key=attrgetter("value")):
+        sourced_information[state.source]["state"] = state.value
+
+    for zip_code in sorted(station.zip_code.values, key=attrgetter("value")):
+        sourced_information[zip_code.source]["zip_code"] = zip_code.value
+
+    for source, address in sourced_information.items():
+        addresses.append({
+            "address": address,
+            "source": {
+                "name": source.system,
+                "quality": source.quality.name,
+            }
+        })
+
+    return sorted(addresses, key=lambda a: (-SourceLocationQualityScore[a["source"]["quality"]].value, -len(a["address"]), a["source"]["name"]))
+
+
+def station_to_geojson_feature(station: Station) -> geojson.Feature:
+    station_location = station.location.get()
+    station_point = geojson.Point(
+        coordinates=(station_location.longitude, station_location.latitude),
+    )
+
+    station_properties = {}
+
+    if station.name.get():
+        station_properties["name"] = sourced_attribute_to_geojson_property(station.name)
+    if station.network:
+        station_properties["network"] = station.network
+    if station.network_id.get():
+        station_properties["network_id"] = sourced_attribute_to_geojson_property(station.network_id)
+
+    if station_addresses := addresses_from_station(station):
+        station_properties["address"] = station_addresses
+
+    references = []
+
+    for osm_id in station.osm_id.all():
+        osm_type, ref = osm_id.split(":")
+
+        references.append({
+            "name": "OPEN_STREET_MAP",
+            "url": f"https://www.openstreetmap.org/{osm_type}/{ref}",
+        })
+
+    for ocm_id in station.ocm_id.all():
+        references.append({
+            "name": "OPEN_CHARGE_MAP",
+            "url": f"https://openchargemap.org/site/poi/details/{ocm_id}",
+        })
+
+    for nrel_id in station.nrel_id.all():
+        references.append({
+            "name": "ALTERNATIVE_FUELS_DATA_CENTER",
+            "url": f"https://afdc.energy.gov/stations#/station/{nrel_id}",
+        })
+
+    if references:
+        station_properties["references"] = sorted(references, key=lambda r: (r["name"], r["url"]))
+
+    if station.charging_points:
+        charging_points = []
+
+        for station_charging_point in sorted(station.charging_points, key=lambda c: (c.name, (c.network_id.get() or ""))):
+            charging_point = {
+                "charging_groups": [],
+                "name": station_charging_point.name,
+            }
+
+            if station_charging_point.network_id.get():
+                charging_point["network_id"] = sourced_attribute_to_geojson_property(station_charging_point.network_id)
+
+            if station_charging_point.ocm_id.get():
+                charging_point["ocm_id"] = sourced_attribute_to_geojson_property(station_charging_point.ocm_id)
+
+            if station_charging_point.osm_id.get():
+                charging_point["osm_id"] = sourced_attribute_to_geojson_property(station_charging_point.osm_id)
+
+            if station_charging_point.nrel_id.get():
+                charging_point["nrel_id"] = sourced_attribute_to_geojson_property(station_charging_point.nrel_id)
+
+            for station_charging_group in station_charging_point.charging_port_groups:
+                charging_group = {
+                    "ports": [],
+                }
+
+                if station_charging_group.network_id:
+                    charging_group["network_id"] = station_charging_group.network_id
+
+                for station_charging_port in station_charging_group.charging_ports:
+                    charging_port = {
+                        "plug_type": station_charging_port.plug.name,
+                    }
+
+                    charging_group["ports"].append(charging_port)
+
+                charging_group["ports"] = sorted(charging_group["ports"], key=lambda p: p["plug_type"])
+
+                charging_point["charging_groups"].append(charging_group)
+
+            charging_points.append(charging_point)
+
+        station_properties["charging_points"] = charging_points
+
+        charging_point_coordinates = set()
+
+        for charging_point in station.charging_points:
+            point_location = charging_point.location.get()
+
+            if not point_location:
+                continue
+
+            charging_point_coordinates.add((point_location.longitude, point_location.latitude))
+
+        if len(charging_point_coordinates) > 1:
+            station_point = geojson.MultiPoint(
+                coordinates=list(sorted(charging_point_coordinates)),
+            )
+        elif len(charging_point_coordinates) == 1:
+            station_point = geojson.Point(
+                coordinates=charging_point_coordinates.pop(),
+            )
+
+    station_properties["summary"] = station_summary(station_properties)
+
+    station_feature = geojson.Feature(
+        geometry=station_point,
+        properties=station_properties,
+    )
+
+    return station_feature
+
+
+def station_summary(station_properties: dict) -> dict:
+    """
+    Returns the display-ready summary of a station, so the map never has to walk the
+    sourced values of each property. The best quality value of each property is the
+    first one in its list, and the references are combined into a bitmask.
+    """
+
+    summary = {}
+
+    if station_properties.get("name"):
+        summary["name"] = station_properties["name"][0]["value"]
+    if station_properties.get("network"):
+        summary["network"] = station_properties["network"]
+    if station_properties.get("network_id"):
+        summary["network_id"] = station_properties["network_id"][0]["value"]
+    if station_properties.get("address"):
+        summary["address"] = format_station_address(station_properties["address"][0]["address"])
+
+    references = ReferenceSource(0)
+
+    for reference in station_properties.get("references", []):
+        references |= ReferenceSource[reference["name"]]
+
+    summary["references"] = references.value
+
+    charging_points = station_properties.get("charging_points", [])
+
+    plug_counts = Counter(
+        port["plug_type"]
+        for charging_point in charging_points
+        for charging_group in charging_point["charging_groups"]
+        for port in charging_group["ports"]
+    )
+
+    summary["charging_points"] = len(charging_points)
+    summary["plugs"] = dict(sorted(plug_counts.items()))
+
+    return summary
+
+
+def format_station_address(address: dict) -> str:
+    return ", ".join(filter(None, [
+        address.get("street_address"),
+        address.get("city"),
+        " ".join(filter(None, [address.get("state"), address.get("zip_code")])),
+    ]))
+
+
+def count_station_ids(station: Station) -> int:
+    id_count = 0
+
+    if station.nrel_id.get():
+        id_count += 1
+
+    if station.osm_id.get():
+        id_count += 1
+
+    if station.ocm_id.get():
+        id_count += 1
+
+    if station.network_id.get():
+        id_count += 1
+
+    return id_count
+
+
+def dumps_compact_json(value) -> str:
+    """
+    Serializes the value to JSON without any whitespace, with orjson when it is
+    installed and the standard library otherwise. Keys are kept in the order they
+    were added, which is the same on every run.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+
+
+class GeoJSONFeatureWriter:
+    """
+    Writes a GeoJSON feature collection to `fh` one feature at a time, so features
+    can be written as soon as each station is turned into one.
+
+    The `output_format` is either "indented", the same as `geojson.dump` with an
+    indent of 4, "compact" without any whitespace, or "lines" for newline-delimited
+    GeoJSON with one feature on each line and no feature collection around them.
+    """
+
+    OUTPUT_FORMATS = ["indented", "compact", "lines"]
+
+    def __init__(self, fh, output_format: str = "indented"):
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unknown GeoJSON output format: {output_format}")
+
+        self.fh = fh
+        self.output_format = output_format
+        self.feature_count = 0
+
+    def __enter__(self) -> Self:
+        if self.output_format == "indented":
+            self.fh.write('{\n    "type": "FeatureCollection",\n    "features": [')
+        elif self.output_format == "compact":
+            self.fh.write('{"type":"FeatureCollection","features":[')
+
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.output_format == "indented":
+            self.fh.write("\n    ]\n}" if self.feature_count else "]\n}")
+        elif self.output_format == "compact":
+            self.fh.write("]}")
+
+    def write(self, feature: geojson.Feature):
+        if self.output_format == "indented":
+            if self.feature_count:
+                self.fh.write(",")
+
+            # Nested two levels deep inside the feature collection
+            self.fh.write("\n        ")
+            self.fh.write(geojson.dumps(feature, indent=4).replace("\n", "\n        "))
+        elif self.output_format == "compact":
+            if self.feature_count:
+                self.fh.write(",")
+
+            self.fh.write(dumps_compact_json(feature))
+        else:
+            self.fh.write(dumps_compact_json(feature))
+            self.fh.write("\n")
+
+        self.feature_count += 1
+
+
+class StationShardWriter:
+    """
+    Writes every station into small JSON files under `shards_dir`, so pages for a
+    single network or station only have to download the stations they show.
+
+    - `networks/{network}.json` lists the station features for each network
+    - `networks/{network}/stations/{shard}.json` is the feature for a single station
+    - `networks/{network}/index.json` maps each network ID to the shard of its station
+
+    Network IDs can contain any characters, so station shards are named after a
+    digest of them and looked up through the index. Like the map used to, the first
+    station with a network ID is the one it points to.
+
+    Features are written out as soon as they are passed in, with a file kept open for
+    the list of each network, so only the indexes are held until the writer is closed.
+    """
+
+    def __init__(self, shards_dir: pathlib.Path):
+        self.shards_dir = shards_dir
+        self.network_files = {}
+        self.network_indexes: dict[str, dict[str, str]] = defaultdict(dict)
+        self.written_shards: set[tuple[str, str]] = set()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, feature: geojson.Feature):
+        network = feature["properties"].get("network")
+
+        if not network:
+            return
+
+        network = network.lower()
+
+        self.write_network_feature(network, feature)
+
+        network_ids = sorted(set(str(value["value"]) for value in feature["properties"].get("network_id", [])))
+
+        if not network_ids:
+            return
+
+        shard = hashlib.blake2b("\n".join(network_ids).encode("utf-8"), digest_size=8).hexdigest()
+
+        if (network, shard) in self.written_shards:
+            return
+
+        self.written_shards.add((network, shard))
+
+        for network_id in network_ids:
+            self.network_indexes[network].setdefault(network_id, shard)
+
+        self.write_file(self.shards_dir / "networks" / network / "stations" / f"{shard}.json", feature)
+
+    def write_network_feature(self, network: str, feature: geojson.Feature):
+        if network in self.network_files:
+            network_fh = self.network_files[network]
+            network_fh.write(",")
+        else:
+            network_file = self.shards_dir / "networks" / f"{network}.json"
+            network_file.parent.mkdir(parents=True, exist_ok=True)
+
+            network_fh = self.network_files[network] = network_file.open("w", encoding="utf-8")
+            network_fh.write("[")
+
+        network_fh.write(dumps_compact_json(feature))
+
+    def close(self):
+        for network, network_fh in self.network_files.items():
+            network_fh.write("]")
+            network_fh.close()
+
+            self.write_file(self.shards_dir / "networks" / network / "index.json", self.network_indexes[network])
+
+        self.network_files = {}
+
+    def write_file(self, shard_file: pathlib.Path, value):
+        shard_file.parent.mkdir(parents=True, exist_ok=True)
+        shard_file.write_text(dumps_compact_json(value), encoding="utf-8")
+
+
+def station_tile_properties(station_feature: geojson.Feature) -> dict:
+    """
+    Returns the properties of a station that the map shows straight from its vector
+    tiles, which is its summary with the plugs flattened and a link to OSM.
+    """
+
+    tile_properties = dict(station_feature["properties"]["summary"])
+
+    # Vector tile properties can't be nested
+    tile_properties["plugs"] = ",".join(tile_properties["plugs"])
+
+    for reference in station_feature["properties"].get("references", []):
+        if reference["name"] == "OPEN_STREET_MAP":
+            tile_properties["osm_url"] = reference["url"]
+
+            break
+
+    return tile_properties
+
+
+def station_tile_point(station: Station, station_feature: geojson.Feature) -> tuple[float, float, dict]:
+    """
+    Returns the longitude and latitude a station is shown at on the map, along with
+    the properties of its vector tile feature.
+    """
+
+    if station_feature["geometry"]["type"] == "Point":
+        longitude, latitude = station_feature["geometry"]["coordinates"]
+    else:
+        # Stations with charging points spread out are still shown as a single marker
+        station_location = station.location.get()
+        longitude, latitude = station_location.longitude, station_location.latitude
+
+    return (longitude, latitude, station_tile_properties(station_feature))
+
+
+def write_station_tiles(tiles_file: pathlib.Path, station_points: list[tuple[float, float, dict]]):
+    """
+    Writes the stations as Mapbox vector tiles into a single PMTiles archive, which
+    the map reads the tiles it needs from with HTTP range requests.
+
+    Up to `STATION_CLUSTER_MAX_ZOOM`, stations close to each other on the map are
+    combined into a single feature with their `point_count`. Beyond it every station
+    is a feature of its own, up to `STATION_TILE_MAX_ZOOM` which the map overzooms.
+    """
+
+    world_coordinates = [web_mercator_coordinates(longitude, latitude) for longitude, latitude, _ in station_points]
+
+    tiles = {}
+
+    for zoom in range(STATION_TILE_MAX_ZOOM + 1):
+        zoom_scale = (1 << zoom) * VECTOR_TILE_EXTENT
+        zoom_features = []
+
+        if zoom <= STATION_CLUSTER_MAX_ZOOM:
+            clusters: dict[tuple[int, int], list[int]] = defaultdict(list)
+
+            for point_index, (world_x, world_y) in enumerate(world_coordinates):
+                cluster_cell = (
+                    int(world_x * zoom_scale) // STATION_CLUSTER_CELL_SIZE,
+                    int(world_y * zoom_scale) // STATION_CLUSTER_CELL_SIZE,
+                )
+
+                clusters[cluster_cell].append(point_index)
+
+            for cluster_indexes in clusters.values():
+                if len(cluster_indexes) == 1:
+                    point_index = cluster_indexes[0]
+                    zoom_features.append((point_index, world_coordinates[point_index], station_points[point_index][2]))
+
+                    continue
+
+                cluster_x = sum(world_coordinates[i][0] for i in cluster_indexes) / len(cluster_indexes)
+                cluster_y = sum(world_coordinates[i][1] for i in cluster_indexes) / len(cluster_indexes)
+
+                # Clusters are numbered after the stations so the identifiers never overlap
+                cluster_id = len(station_points) + cluster_indexes[0]
+
+                zoom_features.append((cluster_id, (cluster_x, cluster_y), {"point_count": len(cluster_indexes)}))
+        else:
+            zoom_features = [
+                (point_index, world_coordinates[point_index], properties)
+                for point_index, (_, _, properties) in enumerate(station_points)
+            ]
+
+        zoom_tiles: dict[tuple[int, int], list] = defaultdict(list)
+        max_tile = (1 << zoom) - 1
+
+        for feature_id, (world_x, world_y), properties in zoom_features:
+            feature_x = int(world_x * zoom_scale)
+            feature_y = int(world_y * zoom_scale)
+
+            # Features close to the edge of a tile are repeated in the tiles next to it, so markers aren't cut off
+            min_tile_x = max((feature_x - VECTOR_TILE_BUFFER) // VECTOR_TILE_EXTENT, 0)
+            max_tile_x = min((feature_x + VECTOR_TILE_BUFFER) // VECTOR_TILE_EXTENT, max_tile)
+            min_tile_y = max((feature_y - VECTOR_TILE_BUFFER) // VECTOR_TILE_EXTENT, 0)
+            max_tile_y = min((feature_y + VECTOR_TILE_BUFFER) // VECTOR_TILE_EXTENT, max_tile)
+
+            for tile_x in range(min_tile_x, max_tile_x + 1):
+                for tile_y in range(min_tile_y, max_tile_y + 1):
+                    tile_feature_x = feature_x - tile_x * VECTOR_TILE_EXTENT
+                    tile_feature_y = feature_y - tile_y * VECTOR_TILE_EXTENT
+
+                    zoom_tiles[(tile_x, tile_y)].append((feature_id, tile_feature_x, tile_feature_y, properties))
+
+        for (tile_x, tile_y), tile_features in zoom_tiles.items():
+            tiles[pmtiles_tile_id(zoom, tile_x, tile_y)] = encode_vector_tile("stations", tile_features)
+
+    longitudes = [longitude for longitude, _, _ in station_points] or [0]
+    latitudes = [latitude for _, latitude, _ in station_points] or [0]
+
+    metadata = {
+        "name": "stations",
+        "format": "pbf",
+        "type": "overlay",
+        "vector_layers": [
+            {
+                "id": "stations",
+                "minzoom": 0,
+                "maxzoom": STATION_TILE_MAX_ZOOM,
+                "fields": {
+                    "point_count": "Number",
+                    "name": "String",
+                    "network": "String",
+                    "network_id": "String",
+                    "address": "String",
+                    "references": "Number",
+                    "osm_url": "String",
+                    "charging_points": "Number",
+                    "plugs": "String",
+                },
+            },
+        ],
+    }
+
+    bounds = (min(longitudes), min(latitudes), max(longitudes), max(latitudes))
+
+    write_pmtiles(tiles_file, tiles, metadata, STATION_TILE_MAX_ZOOM, bounds)
+
+
+def web_mercator_coordinates(longitude: float, latitude: float) -> tuple[float, float]:
+    """
+    Returns the position of the coordinates on the Web Mercator projection of the
+    world, from 0 to 1 going east and south.
+    """
+
+    # The projection is cut off at the latitudes that make the world square
+    latitude = max(min(latitude, 85.0511287798), -85.0511287798)
+
+    world_x = (longitude + 180) / 360
+    world_y = (1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2
+
+    return (min(max(world_x, 0), 1 - 1e-12), min(max(world_y, 0), 1 - 1e-12))
+
+
+def encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    encoded.append(value)
+
+    return bytes(encoded)
+
+
+def encode_protobuf_field(field_number: int, value) -> bytes:
+    """
+    Encodes a single protobuf field, as a varint for integers or length-delimited for
+    bytes and strings. Only the wire types used by vector tiles are supported.
+    """
+
+    if isinstance(value, int):
+        return encode_varint(field_number << 3) + encode_varint(value)
+
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+
+    return encode_varint((field_number << 3) | 2) + encode_varint(len(value)) + value
+
+
+def encode_zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def encode_vector_tile(layer_name: str, features: list[tuple[int, int, int, dict]]) -> bytes:
+    """
+    Encodes a Mapbox vector tile with a single layer of point features, each given
+    as its identifier, its position within the tile and its properties.
+    """
+
+    keys: dict[str, int] = {}
+    values: dict[tuple[type, object], int] = {}
+
+    encoded_features = []
+
+    for feature_id, tile_x, tile_y, properties in features:
+        tags = bytearray()
 
-    return all_stations
+        for key, value in properties.items():
+            if value is None:
+                continue
 
+            tags += encode_varint(keys.setdefault(key, len(keys)))
+            tags += encode_varint(values.setdefault((type(value), value), len(values)))
+
+        # A single MoveTo command to the point
+        geometry = b"".join([
+            encode_varint((1 << 3) | 1),
+            encode_varint(encode_zigzag(tile_x)),
+            encode_varint(encode_zigzag(tile_y)),
+        ])
+
+        encoded_features.append(encode_protobuf_field(2, b"".join([
+            encode_protobuf_field(1, feature_id),
+            encode_protobuf_field(2, bytes(tags)),
+            encode_protobuf_field(3, 1),
+            encode_protobuf_field(4, geometry),
+        ])))
+
+    encoded_values = []
+
+    for (value_type, value) in values:
+        if value_type is bool:
+            encoded_value = encode_protobuf_field(7, int(value))
+        elif value_type is int and value >= 0:
+            encoded_value = encode_protobuf_field(5, value)
+        elif value_type is int:
+            encoded_value = encode_protobuf_field(6, encode_zigzag(value))
+        elif value_type is float:
+            encoded_value = encode_varint((3 << 3) | 1) + struct.pack("<d", value)
+        else:
+            encoded_value = encode_protobuf_field(1, str(value))
 
-def combine_matched_networked_stations_by_network_ids(all_stations: list[Station]) -> list[Station]:
-    def check_network_ids(first_station: Station, second_station: Station) -> bool:
-        if not station_networks_match(first_station, second_station):
-            return False
+        encoded_values.append(encode_protobuf_field(4, encoded_value))
 
-        if set(map(str.lower, first_station.network_id.all())) & set(map(str.lower, second_station.network_id.all())):
-            return True
+    layer = b"".join([
+        encode_protobuf_field(15, 2),
+        encode_protobuf_field(1, layer_name),
+        *encoded_features,
+        *(encode_protobuf_field(3, key) for key in keys),
+        *encoded_values,
+        encode_protobuf_field(5, VECTOR_TILE_EXTENT),
+    ])
 
-        return False
+    return encode_protobuf_field(3, layer)
 
-    def filter_missing_network_id(station: Station):
-        return station.network_id.all()
 
-    return combine_stations_with_check(all_stations, check_network_ids, [filter_out_non_networked, filter_out_unknown_network, filter_missing_network_id])
+def pmtiles_tile_id(zoom: int, tile_x: int, tile_y: int) -> int:
+    """
+    Returns the identifier of a tile in a PMTiles archive, which orders the tiles by
+    their zoom level and then along a Hilbert curve within each zoom level.
+    """
 
+    tile_id = ((1 << (zoom * 2)) - 1) // 3
 
-def combine_nrel_non_networked_with_unsupported_network_at_same_address(all_stations: list[Station]) -> list[Station]:
-    def check_network_ids(first_station: Station, second_station: Station) -> bool:
-        NREL_UNSUPPORTED_NETWORKS = [
-            "AMP_UP",
-            "ENEL_X",
-            "EV_PASSPORT",
-        ]
+    for level in reversed(range(zoom)):
+        level_size = 1 << level
 
-        if first_station.network != "NON_NETWORKED" and second_station.network != "NON_NETWORKED":
-            return False
+        rotate_x = 1 if tile_x & level_size else 0
+        rotate_y = 1 if tile_y & level_size else 0
 
-        if first_station.network == "NON_NETWORKED" and second_station.network == "NON_NETWORKED":
-            return False
+        tile_id += level_size * level_size * ((3 * rotate_x) ^ rotate_y)
 
-        if first_station.network not in NREL_UNSUPPORTED_NETWORKS and second_station.network not in NREL_UNSUPPORTED_NETWORKS:
-            return False
+        if rotate_y == 0:
+            if rotate_x == 1:
+                tile_x = level_size - 1 - tile_x
+                tile_y = level_size - 1 - tile_y
 
-        if not first_station.nrel_id.get() and second_station.nrel_id.get():
-            return False
+            tile_x, tile_y = tile_y, tile_x
 
-        first_addresses = set(map(str.lower, first_station.street_address.all()))
-        second_addresses = set(map(str.lower, second_station.street_address.all()))
+    return tile_id
 
-        if not first_addresses or not second_addresses:
-            return False
 
-        if not (first_addresses & second_addresses):
-            return False
+def serialize_pmtiles_directory(entries: list[tuple[int, int, int, int]]) -> bytes:
+    """
+    Serializes and compresses a directory of `(tile_id, offset, length, run_length)`
+    entries, as columns of varints with the tile identifiers and offsets delta encoded.
+    """
 
-        station_distance = get_station_distance(first_station, second_station)
+    directory = bytearray(encode_varint(len(entries)))
 
-        if station_distance.miles > 0.5:
-            return False
+    last_tile_id = 0
 
-        # Force the network onto the station marked as non-networked
-        if first_station.network == "NON_NETWORKED":
-            first_station.network = second_station.network
-        elif second_station.network == "NON_NETWORKED":
-            second_station.network = first_station.network
+    for tile_id, _, _, _ in entries:
+        directory += encode_varint(tile_id - last_tile_id)
+        last_tile_id = tile_id
 
-        return True
+    for _, _, _, run_length in entries:
+        directory += encode_varint(run_length)
 
-    return combine_stations_with_check(all_stations, check_network_ids)
+    for _, _, length, _ in entries:
+        directory += encode_varint(length)
 
+    for entry_index, (_, offset, _, _) in enumerate(entries):
+        previous_entry = entries[entry_index - 1] if entry_index else None
 
-def combine_stations(all_stations: list[Station]) -> list[Station]:
-    all_stations = combine_matched_stations_by_ids(all_stations)
-    all_stations = combine_matched_networked_stations_by_network_ids(all_stations)
-    all_stations = combine_tesla_superchargers(all_stations)
-    all_stations = combine_nrel_non_networked_with_unsupported_network_at_same_address(all_stations)
+        # Offsets that follow straight on from the previous entry are left out
+        if previous_entry and offset == previous_entry[1] + previous_entry[2]:
+            directory += encode_varint(0)
+        else:
+            directory += encode_varint(offset + 1)
 
-    all_stations = combine_networked_stations_at_same_address(all_stations)
-    all_stations = combine_networked_stations_near_known_address(all_stations)
-    all_stations = combine_networked_stations_close_by(all_stations)
+    return gzip.compress(bytes(directory), mtime=0)
 
-    all_stations = combine_non_networked_stations_at_same_address(all_stations)
-    all_stations = combine_non_networked_stations_close_by(all_stations)
-    all_stations = combine_networked_stations_with_unknown_ones_near_by(all_stations)
-    all_stations = combine_non_networked_stations_with_unknown_ones_near_by(all_stations)
 
-    return all_stations
+def write_pmtiles(
+    tiles_file: pathlib.Path,
+    tiles: dict[int, bytes],
+    metadata: dict,
+    max_zoom: int,
+    bounds: tuple[float, float, float, float],
+):
+    """
+    Writes the tiles into a PMTiles version 3 archive, with the tiles compressed and
+    stored in the order of their identifiers. Tiles with the same contents are only
+    stored once.
+    """
 
+    tile_data = bytearray()
+    tile_offsets: dict[bytes, int] = {}
+    entries: list[tuple[int, int, int, int]] = []
 
-def sourced_attribute_to_geojson_property(sourced_attribute: SourcedAttribute) -> list:
-    property_values = []
+    for tile_id in sorted(tiles):
+        compressed_tile = gzip.compress(tiles[tile_id], mtime=0)
 
-    for sourced_value in sorted(sourced_attribute.values, key=lambda v: (-v.source.quality.value, v.value, v.source.system)):
-        source = sourced_value.source
+        if compressed_tile not in tile_offsets:
+            tile_offsets[compressed_tile] = len(tile_data)
+            tile_data += compressed_tile
 
-        property_value = {
-            "value": sourced_value.value,
-            "source": {
-                "name": source.system,
-                "quality": source.quality.name,
-            }
-        }
+        tile_offset = tile_offsets[compressed_tile]
 
-        property_values.append(property_value)
+        # Runs of the same tile one after another share a single entry
+        if entries and entries[-1][0] + entries[-1][3] == tile_id and entries[-1][1] == tile_offset:
+            entries[-1] = entries[-1][:3] + (entries[-1][3] + 1, )
+        else:
+            entries.append((tile_id, tile_offset, len(compressed_tile), 1))
+
+    root_directory = serialize_pmtiles_directory(entries)
+    leaf_directories = b""
+    leaf_size = 4096
+
+    # The header and root directory have to fit into the first 16 KiB, the rest of the entries go into leaves
+    while PMTILES_HEADER_SIZE + len(root_directory) > 16384:
+        root_entries = []
+        leaf_directories = bytearray()
+
+        for leaf_start in range(0, len(entries), leaf_size):
+            leaf_entries = entries[leaf_start:leaf_start + leaf_size]
+            leaf_directory = serialize_pmtiles_directory(leaf_entries)
+
+            root_entries.append((leaf_entries[0][0], len(leaf_directories), len(leaf_directory), 0))
+            leaf_directories += leaf_directory
+
+        root_directory = serialize_pmtiles_directory(root_entries)
+        leaf_size *= 2
+
+    compressed_metadata = gzip.compress(json.dumps(metadata).encode("utf-8"), mtime=0)
+
+    root_offset = PMTILES_HEADER_SIZE
+    metadata_offset = root_offset + len(root_directory)
+    leaf_offset = metadata_offset + len(compressed_metadata)
+    tile_data_offset = leaf_offset + len(leaf_directories)
+
+    min_longitude, min_latitude, max_longitude, max_latitude = bounds
+
+    header = struct.pack(
+        "<7sBQQQQQQQQQQQBBBBBBiiiiBii",
+        b"PMTiles",
+        3,
+        root_offset,
+        len(root_directory),
+        metadata_offset,
+        len(compressed_metadata),
+        leaf_offset,
+        len(leaf_directories),
+        tile_data_offset,
+        len(tile_data),
+        len(tiles),
+        len(entries),
+        len(tile_offsets),
+        # Clustered, gzip compressed directories and tiles, Mapbox vector tiles
+        1,
+        2,
+        2,
+        1,
+        0,
+        max_zoom,
+        round(min_longitude * 10_000_000),
+        round(min_latitude * 10_000_000),
+        round(max_longitude * 10_000_000),
+        round(max_latitude * 10_000_000),
+        0,
+        round((min_longitude + max_longitude) / 2 * 10_000_000),
+        round((min_latitude + max_latitude) / 2 * 10_000_000),
+    )
 
-    return property_values
+    tiles_file.parent.mkdir(parents=True, exist_ok=True)
 
+    with tiles_file.open("wb") as fh:
+        fh.write(header)
+        fh.write(root_directory)
+        fh.write(compressed_metadata)
+        fh.write(leaf_directories)
+        fh.write(tile_data)
 
-def addresses_from_station(station: Station) -> list:
-    from operator import attrgetter
 
-    addresses = []
+def parse_stations(raw_contents):
+    return [parse_station(raw_station) for raw_station in raw_contents]
 
-    sourced_information: dict[SourceLocation, ] = defaultdict(dict)
 
-    for street_address in sorted(station.street_address.values, key=attrgetter("value")):
-        sourced_information[street_address.source]["street_address"] = street_address.value
+def parse_station(raw_station) -> Station:
+    """
+    Builds a station from a scraped item. Items the item pipeline already normalized
+    with the current version of the normalization are taken as they are, the rest
+    are normalized the same way as the pipeline does it.
+    """
 
-    for city in sorted(station.city.values, key=attrgetter("value")):
-        sourced_information[city.source]["city"] = city.value
+    station = Station()
 
-    for state in sorted(station.state.values, key=attrgetter("value")):
-        sourced_information[state.source]["state"] = state.value
+    normalized = raw_station.get("normalization_version") == STATION_NORMALIZATION_VERSION
 
-    for zip_code in sorted(station.zip_code.values, key=attrgetter("value")):
-        sourced_information[zip_code.source]["zip_code"] = zip_code.value
+    source_data = intern_source_location(
+        system=raw_station["source"]["system"],
+        quality=SourceLocationQualityScore[raw_station["source"]["quality"]],
+    )
 
-    for source, address in sourced_information.items():
-        addresses.append({
-            "address": address,
-            "source": {
-                "name": source.system,
-                "quality": source.quality.name,
-            }
-        })
+    if station_name := raw_station.get("name"):
+        station.name.set(SourcedValue(source_data, station_name))
 
-    return sorted(addresses, key=lambda a: (-SourceLocationQualityScore[a["source"]["quality"]].value, -len(a["address"]), a["source"]["name"]))
+    station_location = Location(
+        latitude=float(raw_station["location"]["latitude"]),
+        longitude=float(raw_station["location"]["longitude"]),
+    )
+    station.location.set(SourcedValue(source_data, station_location))
 
+    if station_network_id := raw_station.get("network_id"):
+        station.network_id.set(SourcedValue(source_data, station_network_id if normalized else str(station_network_id)))
 
-def parse_stations(raw_contents):
-    stations = []
+    station.network = raw_station.get("network") or None
 
-    for raw_station in raw_contents:
-        station = Station()
+    if raw_address := raw_station.get("address"):
+        if street_address := raw_address.get("street_address"):
+            if normalized:
+                station.street_address.set(SourcedValue(source_data, street_address))
+            elif street_address.strip():
+                station.street_address.set(SourcedValue(source_data, normalize_address_street_address(street_address)))
 
-        source_data = SourceLocation(
-            system=raw_station["source"]["system"],
-            quality=SourceLocationQualityScore[raw_station["source"]["quality"]],
-        )
+        if city := raw_address.get("city"):
+            station.city.set(SourcedValue(source_data, city))
 
-        if station_name := raw_station.get("name"):
-            station.name.set(SourcedValue(source_data, station_name))
+        if state := raw_address.get("state"):
+            station.state.set(SourcedValue(source_data, state))
 
-        station_location = Location(
-            latitude=float(raw_station["location"]["latitude"]),
-            longitude=float(raw_station["location"]["longitude"]),
-        )
-        station.location.set(SourcedValue(source_data, station_location))
+        if zip_code := raw_address.get("zip_code"):
+            station.zip_code.set(SourcedValue(source_data, zip_code))
+
+    for reference in raw_station.get("references") or []:
+        if reference["system"] == "ALTERNATIVE_FUEL_DATA_CENTER":
+            station.nrel_id.set(SourcedValue(source_data, int(reference["identifier"])))
 
-        if station_network_id := raw_station.get("network_id"):
-            station.network_id.set(SourcedValue(source_data, str(station_network_id)))
+        if reference["system"] == "OPEN_STREET_MAP":
+            station.osm_id.set(SourcedValue(source_data, reference["identifier"]))
 
-        station.network = raw_station["network"]
+        if reference["system"] == "OPEN_CHARGE_MAP":
+            station.ocm_id.set(SourcedValue(source_data, reference["identifier"]))
 
-        if station.network == "":
-            station.network = None
+    charging_points = []
 
-        if raw_address := raw_station.get("address"):
-            if street_address := raw_address.get("street_address"):
-                if street_address.strip():
-                    station.street_address.set(SourcedValue(source_data, normalize_address_street_address(street_address)))
+    for raw_point in raw_station.get("charging_points") or []:
+        charging_point = ChargingPoint()
 
-            if city := raw_address.get("city"):
-                station.city.set(SourcedValue(source_data, city))
+        if charger_name := raw_point.get("name"):
+            charging_point.name = charger_name
 
-            if state := raw_address.get("state"):
-                station.state.set(SourcedValue(source_data, state))
+        if raw_location := raw_point.get("location"):
+            charger_location = Location(
+                latitude=float(raw_location["latitude"]),
+                longitude=float(raw_location["longitude"]),
+            )
+            charging_point.location.set(SourcedValue(source_data, charger_location))
 
-            if zip_code := raw_address.get("zip_code"):
-                station.zip_code.set(SourcedValue(source_data, zip_code))
+        if point_network_id := raw_point.get("network_id"):
+            charging_point.network_id.set(SourcedValue(source_data, point_network_id if normalized else str(point_network_id)))
 
-        for reference in raw_station.get("references", []):
+        for reference in raw_point.get("references") or []:
             if reference["system"] == "ALTERNATIVE_FUEL_DATA_CENTER":
-                station.nrel_id.set(SourcedValue(source_data, int(reference["identifier"])))
+                charging_point.nrel_id.set(SourcedValue(source_data, int(reference["identifier"])))
 
             if reference["system"] == "OPEN_STREET_MAP":
-                station.osm_id.set(SourcedValue(source_data, reference["identifier"]))
+                charging_point.osm_id.set(SourcedValue(source_data, reference["identifier"]))
 
             if reference["system"] == "OPEN_CHARGE_MAP":
-                station.ocm_id.set(SourcedValue(source_data, reference["identifier"]))
+                charging_point.ocm_id.set(SourcedValue(source_data, reference["identifier"]))
 
-        charging_points = []
+        groups = []
 
-        for raw_point in raw_station.get("charging_points", []):
-            charging_point = ChargingPoint()
+        for raw_evse in raw_point.get("evses") or []:
+            evse_network_id = raw_evse.get("network_id")
 
-            if charger_name := raw_point.get("name"):
-                charging_point.name = charger_name
+            if evse_network_id and not normalized:
+                evse_network_id = str(evse_network_id)
 
-            if raw_location := raw_point.get("location"):
-                charger_location = Location(
-                    latitude=float(raw_location["latitude"]),
-                    longitude=float(raw_location["longitude"]),
-                )
-                charging_point.location.set(SourcedValue(source_data, charger_location))
+            charging_point_group = ChargingPortGroup(
+                network_id=evse_network_id,
+            )
 
-            if point_network_id := raw_point.get("network_id"):
-                charging_point.network_id.set(SourcedValue(source_data, str(point_network_id)))
+            ports = []
 
-            for reference in raw_point.get("references", []):
-                if reference["system"] == "ALTERNATIVE_FUEL_DATA_CENTER":
-                    charging_point.nrel_id.set(SourcedValue(source_data, int(reference["identifier"])))
+            for raw_port in raw_evse.get("plugs") or []:
+                if plug := raw_port["plug"]:
+                    if not normalized:
+                        plug = normalize_plug(plug)
 
-                if reference["system"] == "OPEN_STREET_MAP":
-                    charging_point.osm_id.set(SourcedValue(source_data, reference["identifier"]))
+                    ports.append(intern_charging_port(PlugType[plug]))
 
-                if reference["system"] == "OPEN_CHARGE_MAP":
-                    charging_point.ocm_id.set(SourcedValue(source_data, reference["identifier"]))
+            charging_point_group.charging_ports = ports
 
-            groups = []
+            groups.append(charging_point_group)
 
-            for raw_evse in raw_point.get("evses", []):
-                charging_point_group = ChargingPortGroup(
-                    network_id=raw_evse.get("network_id"),
-                )
+        charging_point.charging_port_groups = groups
 
-                ports = []
+        charging_points.append(charging_point)
 
-                for raw_port in raw_evse.get("plugs", []):
-                    if plug := raw_port["plug"]:
-                        if plug in ["J1772_CABLE", "J1722_CABLE"]:
-                            plug = "J1772"
+    station.charging_points = charging_points
 
-                        port = ChargingPort(
-                            plug=PlugType[plug],
-                        )
+    return station
 
-                        ports.append(port)
 
-                charging_point_group.charging_ports = ports
+def iter_feed_items(fh, json_lines: bool = False, read_size: int = 2**16):
+    """
+    Yields the items of a scraped feed one at a time, along with the text each of
+    them was decoded from, without reading the whole feed into memory first.
 
-                groups.append(charging_point_group)
+    JSON feeds are decoded an item at a time from the array Scrapy writes, reading
+    more of the file whenever an item runs past what has been read so far. JSON
+    Lines feeds are decoded a line at a time.
+    """
 
-            charging_point.charging_port_groups = groups
+    if json_lines:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line), line
 
-            charging_points.append(charging_point)
+        return
 
-        station.charging_points = charging_points
+    decoder = json.JSONDecoder()
 
-        stations.append(station)
+    buffer = ""
+    position = 0
+    end_of_file = False
+    array_started = False
 
-    return stations
+    def read_more():
+        nonlocal buffer, position, end_of_file
 
-scraped_data = pathlib.Path("./scraped_data/")
+        # Grow the reads with the buffer so an item larger than `read_size` isn't decoded over and over again
+        chunk = fh.read(max(read_size, len(buffer) - position))
 
-stations = []
+        if not chunk:
+            end_of_file = True
 
-data_file_map = {}
+        buffer = buffer[position:] + chunk
+        position = 0
 
-for data_file in scraped_data.glob("*"):
-    if not data_file.is_file():
-        data_file_map[data_file.name] = "dir"
-    else:
-        data_file_name, _ = data_file.name.split(".", 1)
-        if data_file_name not in data_file_map:
-            data_file_map[data_file_name] = "file"
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
 
-for source_name, data_type in data_file_map.items():
-    if data_type == "file":
-        data_file = scraped_data / f"{source_name}.json"
+        if position == len(buffer):
+            if end_of_file:
+                break
 
-        with data_file.open() as fh:
-            try:
-                contents = json.load(fh)
-            except:
-                contents = []
+            read_more()
+
+            continue
+
+        if not array_started:
+            if buffer[position] != "[":
+                raise json.JSONDecodeError("Expecting '['", buffer, position)
+
+            array_started = True
+            position += 1
+
+            continue
+
+        if buffer[position] == "]":
+            return
+
+        if buffer[position] == ",":
+            position += 1
+
+            continue
+
+        try:
+            item, item_end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if end_of_file:
+                raise
+
+            read_more()
+
+            continue
+
+        # A number at the end of the buffer may continue in the part that hasn't been read yet
+        if item_end == len(buffer) and not end_of_file:
+            read_more()
+
+            continue
+
+        item_text = buffer[position:item_end]
+        position = item_end
+
+        yield item, item_text
+
+    raise json.JSONDecodeError("Expecting ']'", buffer, position)
+
+
+class ParsedStationCache:
+    """
+    On-disk cache of the stations parsed from scraped feeds, keyed by the path, size
+    and content hash of each feed, so feeds that haven't changed since they were last
+    parsed are loaded with a single memory-mapped read instead of being parsed again.
+
+    Once the cache grows past `max_size_bytes`, the feeds that were least recently
+    loaded are evicted.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, max_size_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+
+    def entry_file(self, data_file: pathlib.Path) -> pathlib.Path:
+        with data_file.open("rb") as fh:
+            content_hash = hashlib.file_digest(fh, "blake2b").hexdigest()
 
-        parsed_stations = parse_stations(contents)
+        entry_key = f"{PARSED_STATION_VERSION}:{data_file.resolve()}:{data_file.stat().st_size}:{content_hash}"
 
-        stations.extend(parsed_stations)
-    elif data_type == "dir":
-        source_dir = scraped_data / source_name
+        return self.cache_dir / f"{hashlib.blake2b(entry_key.encode(), digest_size=16).hexdigest()}.stations"
 
-        data_file_names = sorted([data_file.name for data_file in source_dir.glob("*.json")], reverse=True)
-        for data_file_name in data_file_names:
-            data_file = source_dir / data_file_name
+    def load(self, entry_file: pathlib.Path) -> Optional[list[Station]]:
+        try:
+            with entry_file.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as entry_contents:
+                stations = pickle.loads(entry_contents)
+        except (OSError, ValueError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+            return None
 
-            with data_file.open() as fh:
-                try:
-                    contents = json.load(fh)
-                except:
-                    contents = []
+        # The modification time doubles as the last time the entry was used
+        entry_file.touch()
 
-            if not contents:
+        return stations
+
+    def store(self, entry_file: pathlib.Path, stations: list[Station]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Other worker processes may be loading the same entry, so it is only ever replaced whole
+        temporary_file = entry_file.with_name(f"{entry_file.name}.{os.getpid()}.tmp")
+
+        with temporary_file.open("wb") as fh:
+            pickle.dump(stations, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+        temporary_file.replace(entry_file)
+
+        self.evict()
+
+    def evict(self):
+        entry_stats = []
+
+        for entry_file in self.cache_dir.glob("*.stations"):
+            try:
+                entry_stats.append((entry_file, entry_file.stat()))
+            except FileNotFoundError:
                 continue
 
-            parsed_stations = parse_stations(contents)
+        cache_size = sum(entry_stat.st_size for _, entry_stat in entry_stats)
 
-            stations.extend(parsed_stations)
+        for entry_file, entry_stat in sorted(entry_stats, key=lambda entry: entry[1].st_mtime):
+            if cache_size <= self.max_size_bytes:
+                break
 
-            break
+            entry_file.unlink(missing_ok=True)
+            cache_size -= entry_stat.st_size
 
-combined_data = combine_stations(stations)
 
-combined_data = sorted(combined_data, key=lambda x: (x.name.get() or '', x.network or '', x.location.get().longitude))
+def load_feed_stations(data_file: pathlib.Path, cache: Optional[ParsedStationCache] = None) -> list[Station]:
+    """
+    Loads the stations of a scraped feed from the cache when the feed was already
+    parsed, or parses them and adds them to the cache otherwise.
+    """
 
-station_features = geojson.FeatureCollection([])
-non_reconciled_station_features = geojson.FeatureCollection([])
+    if cache is None:
+        with paused_garbage_collection():
+            return parse_feed_stations(data_file)
 
-for station in combined_data:
-    station_location = station.location.get()
-    station_point = geojson.Point(
-        coordinates=(station_location.longitude, station_location.latitude),
-    )
+    entry_file = cache.entry_file(data_file)
 
-    station_properties = {}
+    with paused_garbage_collection():
+        if (cached_stations := cache.load(entry_file)) is not None:
+            return cached_stations
 
-    if station.name.get():
-        station_properties["name"] = sourced_attribute_to_geojson_property(station.name)
-    if station.network:
-        station_properties["network"] = station.network
-    if station.network_id.get():
-        station_properties["network_id"] = sourced_attribute_to_geojson_property(station.network_id)
+        stations = parse_feed_stations(data_file)
 
-    if station_addresses := addresses_from_station(station):
-        station_properties["address"] = station_addresses
+    cache.store(entry_file, stations)
 
-    references = []
+    return stations
 
-    for osm_id in station.osm_id.all():
-        osm_type, ref = osm_id.split(":")
 
-        references.append({
-            "name": "OPEN_STREET_MAP",
-            "url": f"https://www.openstreetmap.org/{osm_type}/{ref}",
-        })
+@contextmanager
+def paused_garbage_collection():
+    """
+    Pauses the cyclic garbage collector while stations are being created. None of
+    them hold reference cycles, but the collector keeps scanning every one of them
+    as they pile up, which takes longer than creating them.
+    """
 
-    for ocm_id in station.ocm_id.all():
-        references.append({
-            "name": "OPEN_CHARGE_MAP",
-            "url": f"https://openchargemap.org/site/poi/details/{ocm_id}",
-        })
+    if not gc.isenabled():
+        yield
 
-    for nrel_id in station.nrel_id.all():
-        references.append({
-            "name": "ALTERNATIVE_FUELS_DATA_CENTER",
-            "url": f"https://afdc.energy.gov/stations#/station/{nrel_id}",
-        })
+        return
 
-    if references:
-        station_properties["references"] = sorted(references, key=lambda r: (r["name"], r["url"]))
+    gc.disable()
 
-    if station.charging_points:
-        charging_points = []
+    try:
+        yield
+    finally:
+        gc.enable()
 
-        for station_charging_point in sorted(station.charging_points, key=lambda c: (c.name, (c.network_id.get() or ""))):
-            charging_point = {
-                "charging_groups": [],
-                "name": station_charging_point.name,
-            }
 
-            if station_charging_point.network_id.get():
-                charging_point["network_id"] = sourced_attribute_to_geojson_property(station_charging_point.network_id)
+def parse_feed_stations(data_file: pathlib.Path) -> list[Station]:
+    """
+    Parses the stations of a scraped feed while it is being read. A feed that isn't
+    valid JSON all the way through is skipped entirely, the same as an empty one.
+    """
 
-            if station_charging_point.ocm_id.get():
-                charging_point["ocm_id"] = sourced_attribute_to_geojson_property(station_charging_point.ocm_id)
+    if data_file.suffix == ".parquet":
+        return parse_parquet_feed_stations(data_file)
 
-            if station_charging_point.osm_id.get():
-                charging_point["osm_id"] = sourced_attribute_to_geojson_property(station_charging_point.osm_id)
+    stations = []
 
-            if station_charging_point.nrel_id.get():
-                charging_point["nrel_id"] = sourced_attribute_to_geojson_property(station_charging_point.nrel_id)
+    with data_file.open() as fh:
+        try:
+            for raw_station, raw_text in iter_feed_items(fh, json_lines=data_file.suffix == ".jsonl"):
+                station = parse_station(raw_station)
+                station.record_hash = hashlib.blake2b(raw_text.encode(), digest_size=16).digest()
 
-            for station_charging_group in station_charging_point.charging_port_groups:
-                charging_group = {
-                    "ports": [],
-                }
+                stations.append(station)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return []
 
-                if station_charging_group.network_id:
-                    charging_group["network_id"] = station_charging_group.network_id
+    return stations
 
-                for station_charging_port in station_charging_group.charging_ports:
-                    charging_port = {
-                        "plug_type": station_charging_port.plug.name,
-                    }
 
-                    charging_group["ports"].append(charging_port)
+def parse_parquet_feed_stations(data_file: pathlib.Path) -> list[Station]:
+    """
+    Parses the stations of a Parquet feed written by `ParquetItemExporter`. Only the
+    columns in `PARQUET_FEED_COLUMNS` are read, from the memory-mapped file a batch
+    of rows at a time. A feed that can't be read is skipped entirely.
+    """
 
-                charging_group["ports"] = sorted(charging_group["ports"], key=lambda p: p["plug_type"])
+    if pyarrow is None:
+        raise ImportError(f"pyarrow must be installed to load the Parquet feed {data_file}")
 
-                charging_point["charging_groups"].append(charging_group)
+    stations = []
 
-            charging_points.append(charging_point)
+    try:
+        feed = pyarrow.parquet.ParquetFile(data_file, memory_map=True)
 
-        station_properties["charging_points"] = charging_points
+        for record_batch in feed.iter_batches(columns=PARQUET_FEED_COLUMNS):
+            for raw_station in record_batch.to_pylist():
+                station = parse_station(raw_station)
+                # Rows have no text of their own, so the hash is taken over the columns that were read, which are
+                # always in the order of the schema
+                station.record_hash = hashlib.blake2b(dumps_compact_json(raw_station).encode(), digest_size=16).digest()
 
-        charging_point_coordinates = set()
+                stations.append(station)
+    except (OSError, pyarrow.ArrowInvalid):
+        return []
 
-        for charging_point in station.charging_points:
-            point_location = charging_point.location.get()
+    return stations
 
-            if not point_location:
-                continue
 
-            charging_point_coordinates.add((point_location.longitude, point_location.latitude))
+def find_scraped_sources(scraped_data: pathlib.Path) -> dict[str, str]:
+    """
+    Returns the name of every scraped source, mapped to "file" when its feed is a
+    single file or "dir" when it is a directory of timestamped feeds.
+    """
 
-        if len(charging_point_coordinates) > 1:
-            station_point = geojson.MultiPoint(
-                coordinates=list(sorted(charging_point_coordinates)),
-            )
-        elif len(charging_point_coordinates) == 1:
-            station_point = geojson.Point(
-                coordinates=charging_point_coordinates.pop(),
-            )
+    data_file_map = {}
 
-    station_feature = geojson.Feature(
-        geometry=station_point,
-        properties=station_properties,
-    )
-    station_features["features"].append(station_feature)
+    for data_file in scraped_data.glob("*"):
+        if not data_file.is_file():
+            data_file_map[data_file.name] = "dir"
+        else:
+            data_file_name, _ = data_file.name.split(".", 1)
+            if data_file_name not in data_file_map:
+                data_file_map[data_file_name] = "file"
 
-    id_count = 0
+    return data_file_map
 
-    if station.nrel_id.get():
-        id_count += 1
 
-    if station.osm_id.get():
-        id_count += 1
+def load_source_stations(scraped_data: pathlib.Path, source_name: str, data_type: str, cache: Optional[ParsedStationCache] = None) -> list[Station]:
+    if data_type == "file":
+        for suffix in [".json", ".jsonl", ".parquet"]:
+            data_file = scraped_data / f"{source_name}{suffix}"
 
-    if station.ocm_id.get():
-        id_count += 1
+            if data_file.exists():
+                break
 
-    if station.network_id.get():
-        id_count += 1
+        return load_feed_stations(data_file, cache)
+
+    source_dir = scraped_data / source_name
+
+    data_file_names = sorted([data_file.name for data_file in source_dir.glob("*") if data_file.suffix in [".json", ".jsonl", ".parquet"]], reverse=True)
+    for data_file_name in data_file_names:
+        data_file = source_dir / data_file_name
+
+        parsed_stations = load_feed_stations(data_file, cache)
+
+        if not parsed_stations:
+            continue
+
+        return parsed_stations
+
+    return []
+
+
+def load_scraped_stations(scraped_data: pathlib.Path, processes: Optional[int] = None, cache: Optional[ParsedStationCache] = None) -> list[Station]:
+    """
+    Parses the stations of every scraped source, spread over a pool of `processes`
+    worker processes, or all of the cores when it isn't set. The stations are
+    returned in the same order as when the sources are parsed one after another.
+    """
+
+    data_file_map = find_scraped_sources(scraped_data)
+
+    stations = []
+
+    if processes == 1:
+        for source_name, data_type in data_file_map.items():
+            stations.extend(load_source_stations(scraped_data, source_name, data_type, cache))
+
+        return stations
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        source_stations = executor.map(
+            load_source_stations,
+            itertools.repeat(scraped_data),
+            data_file_map.keys(),
+            data_file_map.values(),
+            itertools.repeat(cache),
+        )
+
+        for parsed_stations in source_stations:
+            stations.extend(parsed_stations)
+
+    return stations
+
+
+def main():
+    scraped_data = pathlib.Path("./scraped_data/")
+    # The map is built from the files written here, unless they are sent elsewhere or left out with an empty path
+    map_static_dir = pathlib.Path("./open-ev-map/static/")
+
+    # Only the work done in this process is profiled, not the passes run by worker processes
+    profile_file = os.getenv("RECONCILE_PROFILE")
+    profiler = cProfile.Profile() if profile_file else None
+
+    if profiler:
+        profiler.enable()
+
+    report_file = os.getenv("RECONCILE_REPORT")
+    statistics = [] if report_file else None
+    stage_seconds = {}
+
+    processes = int(os.getenv("RECONCILE_PROCESSES", 0)) or None
+
+    cache = None
+
+    if cache_dir := os.getenv("RECONCILE_CACHE_DIR"):
+        cache = ParsedStationCache(pathlib.Path(cache_dir), int(os.getenv("RECONCILE_CACHE_SIZE", 2**30)))
+
+    stage_start_time = time.perf_counter()
+
+    stations = load_scraped_stations(scraped_data, processes, cache)
+
+    stage_seconds["load"] = time.perf_counter() - stage_start_time
+    stage_start_time = time.perf_counter()
+
+    if state_file := os.getenv("RECONCILE_STATE"):
+        state_file = pathlib.Path(state_file)
+
+        previous_clusters = load_reconcile_state(state_file)
+
+        combined_data, clusters = combine_stations_incremental(stations, previous_clusters, processes, statistics)
+
+        if clusters.keys() != previous_clusters.keys():
+            save_reconcile_state(state_file, clusters)
+    elif os.getenv("RECONCILE_PARTITIONED"):
+        combined_data = combine_stations_partitioned(stations, processes, statistics)
+    else:
+        combined_data = combine_stations(stations, statistics)
+
+    stage_seconds["combine"] = time.perf_counter() - stage_start_time
+    stage_start_time = time.perf_counter()
+
+    combined_data = sorted(combined_data, key=lambda x: (x.name.get() or '', x.network or '', x.location.get().longitude))
+
+    output_format = os.getenv("RECONCILE_OUTPUT_FORMAT", "indented")
+    tiles_file = os.getenv("RECONCILE_TILES", (map_static_dir / "stations.pmtiles").as_posix())
+    shards_dir = os.getenv("RECONCILE_SHARDS", (map_static_dir / "shards").as_posix())
+
+    shard_writer = StationShardWriter(pathlib.Path(shards_dir)) if shards_dir else None
+
+    station_points = []
+    output_suffix = ".geojsonl" if output_format == "lines" else ".geojson"
+
+    with open(f"stations{output_suffix}", "w", encoding="utf-8") as stations_fh, open(f"non-reconciled-stations{output_suffix}", "w", encoding="utf-8") as non_reconciled_stations_fh:
+        station_writer = GeoJSONFeatureWriter(stations_fh, output_format)
+        non_reconciled_station_writer = GeoJSONFeatureWriter(non_reconciled_stations_fh, output_format)
+
+        with station_writer, non_reconciled_station_writer, shard_writer or nullcontext():
+            for station in combined_data:
+                station_feature = station_to_geojson_feature(station)
+
+                if tiles_file:
+                    station_points.append(station_tile_point(station, station_feature))
+
+                if shard_writer:
+                    shard_writer.write(station_feature)
+
+                station_writer.write(station_feature)
+
+                if count_station_ids(station) <= 1:
+                    non_reconciled_station_writer.write(station_feature)
+
+    if tiles_file:
+        write_station_tiles(pathlib.Path(tiles_file), station_points)
+
+    stage_seconds["export"] = time.perf_counter() - stage_start_time
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
 
-    if id_count <= 1:
-        non_reconciled_station_features["features"].append(station_feature)
+    if report_file:
+        write_reconcile_report(pathlib.Path(report_file), stage_seconds, statistics)
 
-with open("stations.geojson", "w") as stations_fh:
-    geojson.dump(station_features, stations_fh, indent=4)
 
-with open("non-reconciled-stations.geojson", "w") as stations_fh:
-    geojson.dump(non_reconciled_station_features, stations_fh, indent=4)
+if __name__ == "__main__":
+    main()
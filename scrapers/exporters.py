@@ -0,0 +1,168 @@
+# Feed exporters used by the FEEDS setting
+#
+# See: https://docs.scrapy.org/en/latest/topics/exporters.html
+
+from scrapy import exporters
+from scrapy.exceptions import NotConfigured
+import inspect
+import scrapy
+import typing
+
+from scrapers.items import StationFeature
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class FastJSONEncoder:
+    """
+    Stands in for the `ScrapyJSONEncoder` of the JSON exporters, encoding with orjson
+    when it is installed. Anything orjson doesn't support natively, such as nested
+    items, is converted by the wrapped encoder.
+
+    orjson only ever indents by two spaces and can't escape non-ASCII characters, so
+    the wrapped encoder is used as it is for any other options.
+    """
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.options = None
+
+        if orjson is None or encoder.ensure_ascii or encoder.indent not in (None, 2):
+            return
+
+        self.options = 0
+
+        if encoder.indent == 2:
+            self.options |= orjson.OPT_INDENT_2
+
+        if encoder.sort_keys:
+            self.options |= orjson.OPT_SORT_KEYS
+
+    def encode(self, value) -> str:
+        if self.options is None:
+            return self.encoder.encode(value)
+
+        return orjson.dumps(value, default=self.default, option=self.options).decode()
+
+    def default(self, value):
+        # Nested items are by far the most common, and converting them through the wrapped encoder is slow
+        if isinstance(value, scrapy.Item):
+            return dict(value)
+
+        return self.encoder.default(value)
+
+
+class JsonItemExporter(exporters.JsonItemExporter):
+    def __init__(self, file, **kwargs):
+        super().__init__(file, **kwargs)
+
+        self.encoder = FastJSONEncoder(self.encoder)
+
+
+class JsonLinesItemExporter(exporters.JsonLinesItemExporter):
+    def __init__(self, file, **kwargs):
+        super().__init__(file, **kwargs)
+
+        self.encoder = FastJSONEncoder(self.encoder)
+
+
+def arrow_type(annotation):
+    """
+    Returns the Arrow type of a field from the annotations of the items, with nested
+    items as structs of their own fields.
+    """
+
+    if typing.get_origin(annotation) is list:
+        return pyarrow.list_(arrow_type(typing.get_args(annotation)[0]))
+
+    if isinstance(annotation, type) and issubclass(annotation, scrapy.Item):
+        return pyarrow.struct([
+            (field_name, arrow_type(field_annotation))
+            for field_name, field_annotation in inspect.get_annotations(annotation).items()
+        ])
+
+    return {
+        str: pyarrow.string(),
+        int: pyarrow.int64(),
+        float: pyarrow.float64(),
+    }[annotation]
+
+
+def arrow_value(value, value_type):
+    """
+    Converts an item into the Python values of its Arrow type, coercing the values
+    spiders fill in loosely, such as numeric identifiers or string coordinates.
+    """
+
+    if value is None:
+        return None
+
+    if pyarrow.types.is_list(value_type):
+        return [arrow_value(element, value_type.value_type) for element in value]
+
+    if pyarrow.types.is_struct(value_type):
+        return {field.name: arrow_value(value.get(field.name), field.type) for field in value_type}
+
+    if pyarrow.types.is_string(value_type):
+        return str(value)
+
+    if pyarrow.types.is_integer(value_type):
+        return int(value) if isinstance(value, (int, float)) else int(float(value))
+
+    return float(value)
+
+
+class ParquetItemExporter(exporters.BaseItemExporter):
+    """
+    Writes `StationFeature` items to a Parquet file, with a column for every field
+    down to the nested ones, so the reconciler can read only the columns it needs
+    instead of decoding every item from JSON. Items are written a batch of rows at
+    a time, and pyarrow must be installed.
+    """
+
+    def __init__(self, file, batch_size: int = 10000, **kwargs):
+        if pyarrow is None:
+            raise NotConfigured("Parquet feeds need pyarrow to be installed")
+
+        # Options only the JSON exporters use, such as `sort_keys`, are ignored
+        super().__init__(dont_fail=True, **kwargs)
+
+        self.file = file
+        self.batch_size = batch_size
+
+        self.item_type = arrow_type(StationFeature)
+        self.schema = pyarrow.schema(list(self.item_type))
+
+        self.rows = []
+        self.writer = None
+
+    def start_exporting(self):
+        self.writer = pyarrow.parquet.ParquetWriter(self.file, self.schema)
+
+    def export_item(self, item):
+        self.rows.append(arrow_value(item, self.item_type))
+
+        if len(self.rows) >= self.batch_size:
+            self.write_rows()
+
+    def finish_exporting(self):
+        self.write_rows()
+
+        self.writer.close()
+
+    def write_rows(self):
+        if not self.rows:
+            return
+
+        self.writer.write_table(pyarrow.Table.from_pylist(self.rows, schema=self.schema))
+
+        self.rows = []
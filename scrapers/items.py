@@ -79,3 +79,6 @@ class StationFeature(scrapy.Item):
 
     references: list[ReferenceFeature] = scrapy.Field()
     source: SourceFeature = scrapy.Field()
+
+    # Set by `ScrapersPipeline` once the station has been normalized
+    normalization_version: int = scrapy.Field()
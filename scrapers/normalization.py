@@ -0,0 +1,98 @@
+# Normalization of scraped stations, shared by the item pipeline, which normalizes
+# stations as they are scraped, and the reconciler, which normalizes the ones that
+# weren't when parsing them
+
+# Bumped whenever the normalization changes, so stations normalized by an older
+# version are normalized again by the reconciler
+STATION_NORMALIZATION_VERSION = 1
+
+# Plugs the reconciler knows about, the same as the members of `PlugType` in reconcile.py
+PLUG_TYPES = frozenset([
+    "J1772",
+    "J1772_SOCKET",
+    "J1772_COMBO",
+    "CHADEMO",
+    "NACS",
+])
+
+# Other names spiders use for the same plugs
+PLUG_ALIASES = {
+    "J1772_CABLE": "J1772",
+    "J1722_CABLE": "J1772",
+}
+
+# Qualities of a source, the same as the members of `SourceLocationQualityScore` in reconcile.py
+SOURCE_QUALITIES = frozenset([
+    "CURATED",
+    "ORIGINAL",
+    "PARTNER",
+    "AGGREGATED",
+])
+
+
+def normalize_plug(plug: str) -> str:
+    return PLUG_ALIASES.get(plug, plug)
+
+
+def normalize_address_street_address(street_address: str) -> str:
+    STREET_TYPE_MAP = {
+        "ave": "Avenue",
+        "blvd": "Boulevard",
+        "cir": "Circle",
+        "ct": "Court",
+        "dr": "Drive",
+        "expy": "Expressway",
+        "hwy": "Highway",
+        "ln": "Lane",
+        "pl": "Place",
+        "pkwy": "Parkway",
+        "rd": "Road",
+        "st": "Street",
+        "sq": "Square",
+        "tpke": "Turnpike",
+    }
+
+    PREFIX_NUMBER_MAP = {
+        "One": "1",
+    }
+
+    abbreviated_street_names = {
+        "N": "North",
+        "E": "East",
+        "S": "South",
+        "W": "West",
+    }
+
+    if " " in street_address:
+        address_parts = list(filter(None, street_address.split(" ")))
+        street_type = address_parts[-1]
+        is_extension = False
+
+        if street_type.lower().startswith("ext"):
+            street_type = address_parts[-2]
+            del address_parts[-1]
+            is_extension = True
+
+        if street_type.endswith(".") or street_type.endswith(","):
+            street_type = street_type[:-1]
+
+        street_type = street_type.lower()
+
+        if street_type in STREET_TYPE_MAP:
+            address_parts[-1] = STREET_TYPE_MAP[street_type]
+
+        if address_parts[0] in PREFIX_NUMBER_MAP:
+            address_parts[0] = PREFIX_NUMBER_MAP[address_parts[0]]
+
+        if len(address_parts) > 3 and address_parts[1] in list(abbreviated_street_names.keys()):
+            address_parts[1] = abbreviated_street_names[address_parts[1]]
+
+        if is_extension:
+            address_parts.append("Extension")
+
+        street_address = " ".join(address_parts)
+
+    if street_address.endswith(".") or street_address.endswith(","):
+        street_address = street_address[:-1]
+
+    return street_address
@@ -3,11 +3,136 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import math
+from typing import Optional
 
-# useful for handling different item types with a single interface
-from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem
+
+from scrapers.items import StationFeature
+from scrapers.normalization import (
+    PLUG_TYPES,
+    SOURCE_QUALITIES,
+    STATION_NORMALIZATION_VERSION,
+    normalize_address_street_address,
+    normalize_plug,
+)
 
 
 class ScrapersPipeline:
+    """
+    Validates every scraped station and normalizes it the same way the reconciler
+    would when parsing it, so it is only done once per scrape and the reconciler
+    can take the station as it is.
+
+    Stations the reconciler couldn't parse are dropped, and counted in the crawl
+    stats under `station_feature/dropped/` by the reason they were dropped.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
     def process_item(self, item, spider):
+        if not isinstance(item, StationFeature):
+            return item
+
+        if error := station_feature_error(item):
+            self.stats.inc_value(f"station_feature/dropped/{error}", spider=spider)
+
+            raise DropItem(f"Invalid station ({error}): {item.get('name')!r}")
+
+        normalize_station_feature(item)
+
+        self.stats.inc_value("station_feature/normalized", spider=spider)
+
         return item
+
+
+def valid_location(location) -> bool:
+    try:
+        latitude = float(location["latitude"])
+        longitude = float(location["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    return math.isfinite(latitude) and math.isfinite(longitude) and abs(latitude) <= 90 and abs(longitude) <= 180
+
+
+def station_feature_error(station: StationFeature) -> Optional[str]:
+    """
+    Returns why the reconciler couldn't parse the station, or `None` when it can.
+    """
+
+    source = station.get("source")
+
+    if not source or not source.get("system") or source.get("quality") not in SOURCE_QUALITIES:
+        return "invalid_source"
+
+    if not station.get("location") or not valid_location(station["location"]):
+        return "invalid_location"
+
+    for reference in station.get("references") or []:
+        if reference.get("system") == "ALTERNATIVE_FUEL_DATA_CENTER" and not str(reference.get("identifier")).isdigit():
+            return "invalid_reference"
+
+    for charging_point in station.get("charging_points") or []:
+        if charging_point.get("location") and not valid_location(charging_point["location"]):
+            return "invalid_charging_point_location"
+
+        for reference in charging_point.get("references") or []:
+            if reference.get("system") == "ALTERNATIVE_FUEL_DATA_CENTER" and not str(reference.get("identifier")).isdigit():
+                return "invalid_reference"
+
+        for evse in charging_point.get("evses") or []:
+            for port in evse.get("plugs") or []:
+                if port.get("plug") and normalize_plug(port["plug"]) not in PLUG_TYPES:
+                    return "unknown_plug"
+
+    return None
+
+
+def normalize_location(location):
+    location["latitude"] = float(location["latitude"])
+    location["longitude"] = float(location["longitude"])
+
+
+def normalize_station_feature(station: StationFeature):
+    """
+    Normalizes a valid station in place, the same way `reconcile.parse_station`
+    normalizes stations that weren't.
+    """
+
+    station["network"] = station.get("network") or None
+
+    if station.get("network_id"):
+        station["network_id"] = str(station["network_id"])
+
+    normalize_location(station["location"])
+
+    if address := station.get("address"):
+        street_address = address.get("street_address")
+
+        if street_address and street_address.strip():
+            address["street_address"] = normalize_address_street_address(street_address)
+        elif "street_address" in address:
+            del address["street_address"]
+
+    for charging_point in station.get("charging_points") or []:
+        if charging_point.get("network_id"):
+            charging_point["network_id"] = str(charging_point["network_id"])
+
+        if charging_point.get("location"):
+            normalize_location(charging_point["location"])
+
+        for evse in charging_point.get("evses") or []:
+            if evse.get("network_id"):
+                evse["network_id"] = str(evse["network_id"])
+
+            for port in evse.get("plugs") or []:
+                if port.get("plug"):
+                    port["plug"] = normalize_plug(port["plug"])
+
+    station["normalization_version"] = STATION_NORMALIZATION_VERSION
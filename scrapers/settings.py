@@ -63,9 +63,9 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 4
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "scrapers.pipelines.ScrapersPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "scrapers.pipelines.ScrapersPipeline": 300,
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -92,17 +92,35 @@ TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 
 FEED_ROOT = os.getenv("SCRAPED_DATA_DIR", (pathlib.Path(__file__) / ".." / ".." / "scraped_data").resolve().as_posix())
 
+# Feeds are written as Parquet when set, which the reconciler loads a column at a time instead of decoding JSON
+FEED_PARQUET = bool(os.getenv("SCRAPED_DATA_PARQUET"))
+
+feeds_format = "parquet" if FEED_PARQUET else "json"
+
 if "-a" not in sys.argv:
-    feeds_path = FEED_ROOT + "/%(name)s.json"
+    feeds_path = FEED_ROOT + f"/%(name)s.{feeds_format}"
 else:
-    feeds_path = FEED_ROOT + "/%(name)s/%(time)s.json"
+    feeds_path = FEED_ROOT + f"/%(name)s/%(time)s.{feeds_format}"
+
+# Feeds are written without any whitespace when set, which is much smaller but harder to read
+FEED_COMPACT = bool(os.getenv("SCRAPED_DATA_COMPACT"))
+
+FEED_EXPORTERS = {
+    "json": "scrapers.exporters.JsonItemExporter",
+    "jsonlines": "scrapers.exporters.JsonLinesItemExporter",
+    "parquet": "scrapers.exporters.ParquetItemExporter",
+}
 
 FEEDS = {
     feeds_path: {
-        "format": "json",
+        "format": feeds_format,
         "encoding": "utf-8",
-        "indent": 2,
+        "indent": None if FEED_COMPACT else 2,
         "overwrite": True,
+        "item_export_kwargs": {
+            # Keeps the feeds diffable between runs no matter the order spiders fill in their items
+            "sort_keys": True,
+        },
     }
 }
 
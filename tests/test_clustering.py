@@ -0,0 +1,100 @@
+import reconcile
+
+
+def make_station(name: str, latitude: float, longitude: float, osm_ids=()) -> reconcile.Station:
+    return reconcile.parse_station({
+        "name": name,
+        "source": {"system": "OPEN_STREET_MAP", "quality": "ORIGINAL"},
+        "location": {"latitude": latitude, "longitude": longitude},
+        "references": [{"system": "OPEN_STREET_MAP", "identifier": osm_id} for osm_id in osm_ids],
+    })
+
+
+def share_osm_id(first_station: reconcile.Station, second_station: reconcile.Station) -> bool:
+    return bool(first_station.features.osm_ids & second_station.features.osm_ids)
+
+
+def station_names(stations: list[reconcile.Station]) -> list[list[str]]:
+    return [sorted(station.name.all()) for station in stations]
+
+
+def test_disjoint_set_merges_groups():
+    clusters = reconcile.DisjointSet(6)
+
+    clusters.union(0, 3)
+    clusters.union(4, 3)
+    clusters.union(1, 5)
+
+    assert clusters.find(0) == clusters.find(4)
+    assert clusters.find(1) == clusters.find(5)
+    assert clusters.find(0) != clusters.find(1)
+    assert clusters.find(2) == 2
+
+    assert clusters.groups() == [[0, 3, 4], [1, 5], [2]]
+
+
+def test_disjoint_set_union_of_same_group_is_a_no_op():
+    clusters = reconcile.DisjointSet(3)
+
+    clusters.union(0, 1)
+    clusters.union(1, 0)
+
+    assert clusters.sizes[clusters.find(0)] == 2
+    assert clusters.groups() == [[0, 1], [2]]
+
+
+def test_cluster_stations_with_check_merges_in_the_same_order_as_the_greedy_pass():
+    # "b" shares an identifier with both "a" and "c", which don't share one with each other. The greedy pass only
+    # merges "c" once "a" and "b" are merged, so that station is finished after the one merged from "d" and "e".
+    stations = [
+        make_station("a", 42.0, -71.0, ["node/1"]),
+        make_station("d", 44.0, -73.0, ["node/3"]),
+        make_station("b", 42.0, -71.0, ["node/1", "node/2"]),
+        make_station("unmatched", 43.0, -72.0, ["node/9"]),
+        make_station("e", 44.0, -73.0, ["node/3"]),
+        make_station("c", 42.0, -71.0, ["node/2"]),
+    ]
+
+    clustered = reconcile.cluster_stations_with_check(stations, share_osm_id)
+    combined = reconcile.combine_stations_with_check(stations, share_osm_id)
+
+    assert station_names(clustered) == station_names(combined)
+    assert station_names(clustered) == [["unmatched"], ["d", "e"], ["a", "b", "c"]]
+
+
+def test_cluster_stations_with_check_only_compares_pairs_within_distance():
+    checked_pairs = []
+
+    def check(first_station: reconcile.Station, second_station: reconcile.Station) -> bool:
+        checked_pairs.append((first_station.name.get(), second_station.name.get()))
+
+        return reconcile.stations_within_distance(first_station, second_station, 0.01)
+
+    stations = [
+        make_station("a", 42.0, -71.0),
+        make_station("far", 42.5, -71.0),
+        make_station("b", 42.0001, -71.0),
+    ]
+
+    clustered = reconcile.cluster_stations_with_check(stations, check, max_distance_miles=0.01)
+
+    assert checked_pairs == [("a", "b")]
+    assert station_names(clustered) == station_names(reconcile.combine_stations_with_check(stations, check))
+    assert station_names(clustered) == [["far"], ["a", "b"]]
+
+
+def test_cluster_stations_by_keys_matches_cluster_stations_with_check():
+    stations = [
+        make_station("a", 42.0, -71.0, ["node/1"]),
+        make_station("b", 42.0, -71.0, ["node/2"]),
+        make_station("c", 42.0, -71.0, ["node/2", "node/1"]),
+        make_station("d", 42.0, -71.0, ["node/4"]),
+    ]
+
+    def station_osm_ids(station: reconcile.Station):
+        return station.features.osm_ids
+
+    by_keys = reconcile.cluster_stations_by_keys(stations, station_osm_ids)
+
+    assert station_names(by_keys) == station_names(reconcile.cluster_stations_with_check(stations, share_osm_id))
+    assert station_names(by_keys) == [["d"], ["a", "b", "c"]]
@@ -0,0 +1,60 @@
+import io
+import json
+
+import pytest
+
+import reconcile
+
+
+FEED_ITEMS = [
+    {"name": "Station, with a comma", "location": {"latitude": 42.25, "longitude": -71.75}},
+    {"name": "Brackets ] and [ in a string", "references": [{"system": "OPEN_STREET_MAP", "identifier": "node/1"}]},
+    {"name": "Escaped \"quotes\" é", "charging_points": []},
+]
+
+
+def feed_items(text: str, read_size: int, json_lines: bool = False) -> list:
+    return list(reconcile.iter_feed_items(io.StringIO(text), json_lines=json_lines, read_size=read_size))
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64, 2**16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_items_are_decoded_across_read_boundaries(read_size: int, indent):
+    text = json.dumps(FEED_ITEMS, indent=indent)
+
+    items = feed_items(text, read_size)
+
+    assert [item for item, _ in items] == FEED_ITEMS
+    assert [json.loads(item_text) for _, item_text in items] == FEED_ITEMS
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3])
+def test_numbers_split_between_reads_are_not_cut_short(read_size: int):
+    assert [item for item, _ in feed_items("[1, 23, 456, 7890]", read_size)] == [1, 23, 456, 7890]
+
+
+@pytest.mark.parametrize("read_size", [1, 4, 2**16])
+def test_item_text_is_the_text_it_was_decoded_from(read_size: int):
+    text = '[\n  {"b": 1, "a": [1, 2]},\n  {"a": "x"}\n]'
+
+    assert [item_text for _, item_text in feed_items(text, read_size)] == ['{"b": 1, "a": [1, 2]}', '{"a": "x"}']
+
+
+@pytest.mark.parametrize("read_size", [1, 2**16])
+def test_empty_array_has_no_items(read_size: int):
+    assert feed_items(" [ ] ", read_size) == []
+
+
+@pytest.mark.parametrize("text", ["", "[", '[{"name": "Station"}', '[{"name": "Sta', '{"name": "Station"}'])
+@pytest.mark.parametrize("read_size", [1, 2**16])
+def test_incomplete_feeds_are_rejected(text: str, read_size: int):
+    with pytest.raises(json.JSONDecodeError):
+        feed_items(text, read_size)
+
+
+def test_json_lines_feeds_skip_blank_lines():
+    text = "".join(json.dumps(item) + "\n\n" for item in FEED_ITEMS)
+
+    items = feed_items(text, read_size=1, json_lines=True)
+
+    assert [item for item, _ in items] == FEED_ITEMS
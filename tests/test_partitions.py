@@ -0,0 +1,150 @@
+import hashlib
+import json
+import math
+from typing import Optional
+
+import reconcile
+
+
+MILES_PER_DEGREE_OF_LATITUDE = reconcile.EARTH_RADIUS_MILES * math.pi / 180
+
+# Tiles are split on whole degrees, so the stations around this latitude are on both sides of an edge
+EDGE_LATITUDE = 42.0
+
+
+def miles_from_edge(miles: float) -> float:
+    return EDGE_LATITUDE + miles / MILES_PER_DEGREE_OF_LATITUDE
+
+
+# Name, network, latitude and street address
+RAW_STATIONS = [
+    # Same address 0.3 miles apart across the edge, chained with a station without an address 0.04 miles away
+    ("North Lot", "CHARGEPOINT", miles_from_edge(-0.15), "1 Main St"),
+    ("South Lot", "CHARGEPOINT", miles_from_edge(0.15), "1 Main St"),
+    ("South Lot Annex", "CHARGEPOINT", miles_from_edge(0.19), None),
+    # A pair 0.09 miles apart across the edge, where only one of them has an address
+    ("Town Hall", "NON_NETWORKED", miles_from_edge(-0.045), "2 Elm St"),
+    ("Town Hall Garage", "NON_NETWORKED", miles_from_edge(0.045), None),
+    # Stations left on their own on both sides of the edge, and one at the same address far away from the rest
+    ("Library", "CHARGEPOINT", EDGE_LATITUDE - 0.5, "3 Oak St"),
+    ("School", "NON_NETWORKED", EDGE_LATITUDE + 0.5, None),
+    ("Far Away", "CHARGEPOINT", EDGE_LATITUDE + 3.5, "1 Main St"),
+]
+
+
+def scraped_item(name: str, network: str, latitude: float, street_address: Optional[str]) -> dict:
+    item = {
+        "name": name,
+        "network": network,
+        "source": {"system": network, "quality": "ORIGINAL"},
+        "location": {"latitude": latitude, "longitude": -71.5},
+    }
+
+    if street_address:
+        item["address"] = {"street_address": street_address, "city": "Worcester"}
+
+    return item
+
+
+def parse_stations(raw_stations: list[tuple]) -> list[reconcile.Station]:
+    """
+    Parses the stations again for every run, since the passes change the stations they merge.
+    """
+
+    stations = []
+
+    for raw_station in raw_stations:
+        item = scraped_item(*raw_station)
+
+        station = reconcile.parse_station(item)
+        station.record_hash = hashlib.blake2b(json.dumps(item).encode(), digest_size=16).digest()
+
+        stations.append(station)
+
+    return stations
+
+
+def station_features(stations: list[reconcile.Station]) -> list[str]:
+    """
+    Returns the features of the stations in a set order, since partitioned stations are returned in tile order.
+    """
+
+    return sorted(json.dumps(reconcile.station_to_geojson_feature(station), sort_keys=True) for station in stations)
+
+
+def station_names(stations: list[reconcile.Station]) -> list[list[str]]:
+    return [sorted(station.name.all()) for station in stations]
+
+
+def test_groups_crossing_a_tile_edge_are_kept_whole():
+    stations = parse_stations(RAW_STATIONS)
+
+    groups = reconcile.partition_station_groups(stations)
+
+    group_names = [sorted(stations[station_key].name.get() for station_key in group_keys) for group_keys in groups]
+
+    assert sorted(group_names) == [
+        ["Far Away"],
+        ["Library"],
+        ["North Lot", "South Lot", "South Lot Annex"],
+        ["School"],
+        ["Town Hall", "Town Hall Garage"],
+    ]
+
+    # The groups are kept in the tile of their first station, south of the edge
+    tiles = reconcile.partition_stations(stations)
+
+    assert [[station.name.get() for station in tile_stations] for tile_stations in tiles] == [
+        ["North Lot", "South Lot", "South Lot Annex", "Town Hall", "Town Hall Garage", "Library"],
+        ["School"],
+        ["Far Away"],
+    ]
+
+
+def test_partitioned_stations_are_combined_the_same_as_all_of_them_together():
+    combined = reconcile.combine_stations(parse_stations(RAW_STATIONS))
+    partitioned = reconcile.combine_stations_partitioned(parse_stations(RAW_STATIONS), processes=1)
+
+    assert sorted(station_names(combined)) == [
+        ["Far Away"],
+        ["Library"],
+        ["North Lot", "South Lot", "South Lot Annex"],
+        ["School"],
+        ["Town Hall", "Town Hall Garage"],
+    ]
+
+    assert station_features(partitioned) == station_features(combined)
+
+
+def test_incremental_run_with_removed_records_matches_a_fresh_run():
+    _, clusters = reconcile.combine_stations_incremental(parse_stations(RAW_STATIONS), {}, processes=1)
+
+    # Removing the station joining the two lots splits their group up, while the other groups are reused
+    remaining_stations = [raw_station for raw_station in RAW_STATIONS if raw_station[0] not in ["South Lot", "School"]]
+
+    statistics = []
+    incremental, next_clusters = reconcile.combine_stations_incremental(
+        parse_stations(remaining_stations),
+        clusters,
+        processes=1,
+        statistics=statistics,
+    )
+    fresh, fresh_clusters = reconcile.combine_stations_incremental(parse_stations(remaining_stations), {}, processes=1)
+
+    combined = reconcile.combine_stations(parse_stations(remaining_stations))
+
+    assert station_features(incremental) == station_features(fresh)
+    assert station_features(incremental) == station_features(combined)
+    assert sorted(station_names(incremental)) == [
+        ["Far Away"],
+        ["Library"],
+        ["North Lot"],
+        ["South Lot Annex"],
+        ["Town Hall", "Town Hall Garage"],
+    ]
+
+    assert next_clusters.keys() == fresh_clusters.keys()
+
+    # Only the two groups left from the split are combined again
+    assert len(next_clusters.keys() - clusters.keys()) == 2
+    assert statistics[0].stations_in == 2
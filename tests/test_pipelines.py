@@ -0,0 +1,124 @@
+import copy
+
+import pytest
+from scrapy.exceptions import DropItem
+
+import reconcile
+from scrapers.items import StationFeature
+from scrapers.normalization import PLUG_TYPES, SOURCE_QUALITIES, STATION_NORMALIZATION_VERSION
+from scrapers.pipelines import ScrapersPipeline
+
+
+VALID_STATION = {
+    "name": "Station",
+    "source": {"system": "OPEN_STREET_MAP", "quality": "ORIGINAL"},
+    "location": {"latitude": "42.25", "longitude": "-71.75"},
+    "address": {"street_address": "1 Main St", "city": "Worcester"},
+    "network": "",
+    "network_id": 1234,
+    "references": [{"system": "ALTERNATIVE_FUEL_DATA_CENTER", "identifier": "5678"}],
+    "charging_points": [
+        {
+            "network_id": 1,
+            "location": {"latitude": 42.25, "longitude": -71.75},
+            "evses": [{"network_id": 2, "plugs": [{"plug": "J1772_CABLE"}, {"plug": "CHADEMO"}]}],
+        },
+    ],
+}
+
+
+class CrawlStats:
+    def __init__(self):
+        self.values = {}
+
+    def inc_value(self, key, count=1, start=0, spider=None):
+        self.values[key] = self.values.get(key, start) + count
+
+
+class Spider:
+    name = "test"
+
+
+def make_station(**changes) -> StationFeature:
+    station = copy.deepcopy(VALID_STATION)
+    station.update(changes)
+
+    return StationFeature(**station)
+
+
+def make_charging_point(**changes) -> dict:
+    charging_point = copy.deepcopy(VALID_STATION["charging_points"][0])
+    charging_point.update(changes)
+
+    return charging_point
+
+
+@pytest.mark.parametrize("reason, station", [
+    ("invalid_source", make_station(source=None)),
+    ("invalid_source", make_station(source={"system": "", "quality": "ORIGINAL"})),
+    ("invalid_source", make_station(source={"system": "OPEN_STREET_MAP", "quality": "MADE_UP"})),
+    ("invalid_location", make_station(location=None)),
+    ("invalid_location", make_station(location={"latitude": "north", "longitude": -71.75})),
+    ("invalid_location", make_station(location={"latitude": 91, "longitude": -71.75})),
+    ("invalid_location", make_station(location={"latitude": float("nan"), "longitude": -71.75})),
+    ("invalid_reference", make_station(references=[{"system": "ALTERNATIVE_FUEL_DATA_CENTER", "identifier": "abc"}])),
+    ("invalid_reference", make_station(charging_points=[
+        make_charging_point(references=[{"system": "ALTERNATIVE_FUEL_DATA_CENTER", "identifier": None}]),
+    ])),
+    ("invalid_charging_point_location", make_station(charging_points=[
+        make_charging_point(location={"latitude": 42.25, "longitude": 181}),
+    ])),
+    ("unknown_plug", make_station(charging_points=[
+        make_charging_point(evses=[{"plugs": [{"plug": "TYPE_2"}]}]),
+    ])),
+])
+def test_invalid_stations_are_dropped(reason: str, station: StationFeature):
+    stats = CrawlStats()
+
+    with pytest.raises(DropItem, match=reason):
+        ScrapersPipeline(stats).process_item(station, Spider())
+
+    assert stats.values == {f"station_feature/dropped/{reason}": 1}
+
+
+def test_valid_stations_are_normalized():
+    stats = CrawlStats()
+
+    station = ScrapersPipeline(stats).process_item(make_station(), Spider())
+
+    assert stats.values == {"station_feature/normalized": 1}
+
+    assert station["normalization_version"] == STATION_NORMALIZATION_VERSION
+    assert station["network"] is None
+    assert station["network_id"] == "1234"
+    assert station["location"] == {"latitude": 42.25, "longitude": -71.75}
+    assert station["address"]["street_address"] == "1 Main Street"
+
+    charging_point = station["charging_points"][0]
+
+    assert charging_point["network_id"] == "1"
+    assert charging_point["evses"][0]["network_id"] == "2"
+    assert [port["plug"] for port in charging_point["evses"][0]["plugs"]] == ["J1772", "CHADEMO"]
+
+
+def test_other_items_are_passed_through():
+    stats = CrawlStats()
+    item = {"not": "a station"}
+
+    assert ScrapersPipeline(stats).process_item(item, Spider()) is item
+    assert stats.values == {}
+
+
+def test_normalized_and_raw_stations_are_parsed_the_same():
+    raw_station = dict(make_station())
+    normalized_station = dict(ScrapersPipeline(CrawlStats()).process_item(make_station(), Spider()))
+
+    raw_feature = reconcile.station_to_geojson_feature(reconcile.parse_station(raw_station))
+    normalized_feature = reconcile.station_to_geojson_feature(reconcile.parse_station(normalized_station))
+
+    assert normalized_feature == raw_feature
+
+
+def test_normalization_matches_the_reconciler():
+    assert PLUG_TYPES == set(reconcile.PlugType.__members__)
+    assert SOURCE_QUALITIES == set(reconcile.SourceLocationQualityScore.__members__)
@@ -0,0 +1,69 @@
+import gzip
+import itertools
+
+import pytest
+
+import reconcile
+
+
+@pytest.mark.parametrize("zoom, tile_x, tile_y, tile_id", [
+    (0, 0, 0, 0),
+    (1, 0, 0, 1),
+    (1, 0, 1, 2),
+    (1, 1, 1, 3),
+    (1, 1, 0, 4),
+    (2, 0, 0, 5),
+    (3, 5, 2, 76),
+    (12, 3423, 1763, 19078479),
+    (14, 16383, 16383, 268435455),
+])
+def test_pmtiles_tile_id(zoom: int, tile_x: int, tile_y: int, tile_id: int):
+    assert reconcile.pmtiles_tile_id(zoom, tile_x, tile_y) == tile_id
+
+
+def test_pmtiles_tile_ids_cover_every_tile_once():
+    tile_ids = [
+        reconcile.pmtiles_tile_id(zoom, tile_x, tile_y)
+        for zoom in range(5)
+        for tile_x, tile_y in itertools.product(range(1 << zoom), repeat=2)
+    ]
+
+    assert sorted(tile_ids) == list(range(len(tile_ids)))
+
+
+def test_station_tiles_can_be_read_back(tmp_path):
+    pmtiles_reader = pytest.importorskip("pmtiles.reader")
+    mapbox_vector_tile = pytest.importorskip("mapbox_vector_tile")
+
+    station_properties = {"name": "Station", "network": "CHARGEPOINT", "references": 1, "plugs": "J1772"}
+    station_points = [
+        (-71.75, 42.25, station_properties),
+        (-71.7501, 42.2501, {"name": "Next door", "references": 0, "plugs": ""}),
+    ]
+
+    tiles_file = tmp_path / "stations.pmtiles"
+    reconcile.write_station_tiles(tiles_file, station_points)
+
+    with tiles_file.open("rb") as fh:
+        reader = pmtiles_reader.Reader(pmtiles_reader.MmapSource(fh))
+
+        header = reader.header()
+
+        assert header["min_zoom"] == 0
+        assert header["max_zoom"] == reconcile.STATION_TILE_MAX_ZOOM
+        assert reader.metadata()["vector_layers"][0]["id"] == "stations"
+
+        # Both stations are clustered together at low zooms, and shown on their own at the highest one
+        world_x, world_y = reconcile.web_mercator_coordinates(-71.75, 42.25)
+
+        def read_tile(zoom: int) -> list[dict]:
+            tile = reader.get(zoom, int(world_x * (1 << zoom)), int(world_y * (1 << zoom)))
+
+            return mapbox_vector_tile.decode(gzip.decompress(tile))["stations"]["features"]
+
+        assert [feature["properties"] for feature in read_tile(0)] == [{"point_count": 2}]
+
+        features = read_tile(reconcile.STATION_TILE_MAX_ZOOM)
+
+        assert sorted(feature["properties"]["name"] for feature in features) == ["Next door", "Station"]
+        assert station_properties in [feature["properties"] for feature in features]